@@ -0,0 +1,84 @@
+import argparse
+import csv
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import comandos
+import escena as escenas
+import motor
+
+# Barrido de parámetros en paralelo.
+# Cada combinación de la malla se simula en un proceso del pool con su propio
+# MotorGoldberg (y por lo tanto su propio pymunk.Space).
+
+PARAMETROS = ("k", "x", "masa", "radio", "gravedad")
+RESULTADOS = ("alcanzo_dominos", "dominos_caidos", "energia_mecanica_final")
+
+def malla(k=None, x=None, masa=None, radio=None, gravedad=None, por_defecto=motor.PARAMETROS_POR_DEFECTO):
+    """Producto cartesiano de los valores dados; los que faltan usan el valor por defecto."""
+    valores = {"k": k, "x": x, "masa": masa, "radio": radio, "gravedad": gravedad}
+    ejes = [valores[p] if valores[p] else [por_defecto[p]] for p in PARAMETROS]
+    return [dict(zip(PARAMETROS, combinacion)) for combinacion in itertools.product(*ejes)]
+
+
+def _ejecutar_corrida(argumentos):
+    parametros, duracion, dt, num_dominos, escena = argumentos
+    plantilla = motor.plantilla_para(escena, num_dominos)
+    sim = motor.MotorGoldberg(num_dominos=num_dominos, plantilla=plantilla, series=False, **parametros)
+    resultados = sim.ejecutar(duracion, dt)
+    # Solo se devuelve el resumen: las series completas no se envían de vuelta
+    return tuple(resultados[r] for r in RESULTADOS)
+
+
+def barrido(combinaciones, duracion=10.0, dt=motor.DT, num_dominos=motor.NUM_DOMINOS, procesos=None, escena=None):
+    """Simula cada combinación en paralelo y devuelve una tabla por columnas.
+
+    `escena` es la ruta o el nombre de un archivo de escena; cada proceso la
+    compila (o la lee de la caché en disco) una sola vez.
+    """
+    procesos = comandos.num_procesos(procesos)
+    tareas = [(parametros, duracion, dt, num_dominos, escena) for parametros in combinaciones]
+    chunksize = max(1, len(tareas) // (procesos * 4))
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        salidas = list(pool.map(_ejecutar_corrida, tareas, chunksize=chunksize))
+
+    tabla = {p: [c[p] for c in combinaciones] for p in PARAMETROS}
+    for i, nombre in enumerate(RESULTADOS):
+        tabla[nombre] = [salida[i] for salida in salidas]
+    return tabla
+
+
+def guardar_csv(tabla, archivo):
+    columnas = list(tabla)
+    escritor = csv.writer(archivo)
+    escritor.writerow(columnas)
+    escritor.writerows(zip(*(tabla[c] for c in columnas)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de la máquina de Goldberg.")
+    for p in PARAMETROS:
+        parser.add_argument(f"--{p}", type=float, nargs="+", help=f"Valores de {p} a barrer")
+    comandos.agregar_escena(parser)
+    comandos.agregar_dominos(parser, motor.NUM_DOMINOS, motor.MAX_DOMINOS)
+    parser.add_argument("--duracion", type=float, default=10.0, help="Tiempo simulado por corrida (s)")
+    parser.add_argument("--dt", type=float, default=motor.DT, help="Paso de integración (s)")
+    comandos.agregar_procesos(parser)
+    comandos.agregar_salida(parser, "CSV")
+    args = parser.parse_args(argv)
+
+    por_defecto = escenas.cargar(args.escena).parametros() if args.escena else motor.PARAMETROS_POR_DEFECTO
+    combinaciones = malla(args.k, args.x, args.masa, args.radio, args.gravedad, por_defecto)
+    tabla = barrido(combinaciones, args.duracion, args.dt, args.dominos, args.procesos, args.escena)
+
+    if args.salida:
+        with open(args.salida, "w", newline="", encoding="utf-8") as archivo:
+            guardar_csv(tabla, archivo)
+    else:
+        guardar_csv(tabla, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
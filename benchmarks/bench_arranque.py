@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tiempo de arranque de un proceso trabajador sin ventana.
+# Cada medición es un intérprete nuevo (como un proceso del pool de
+# barrido.py): se mide cuánto tarda en importar el núcleo y en tener lista la
+# primera simulación, y se comprueba que no se cargaron pygame ni matplotlib.
+
+MODULOS = ("motor", "barrido")
+PROHIBIDOS = ("pygame", "matplotlib")
+PRESUPUESTO_S = {
+    "importar": 0.5,         # Importar el módulo con todas sus dependencias
+    "primer_motor": 0.75,    # Importar + construir el primer MotorGoldberg
+}
+
+_SONDA = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+importado = time.perf_counter()
+import motor
+motor.MotorGoldberg()
+listo = time.perf_counter()
+print(json.dumps({{
+    "importar": importado - inicio,
+    "primer_motor": listo - inicio,
+    "cargados": [m for m in {prohibidos!r} if m in sys.modules],
+}}))
+"""
+
+
+def medir(modulo, repeticiones):
+    """Mediana de varias corridas en intérpretes nuevos."""
+    codigo = _SONDA.format(modulo=modulo, prohibidos=PROHIBIDOS)
+    muestras = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True,
+                                capture_output=True, text=True).stdout
+        muestras.append(json.loads(salida.splitlines()[-1]))
+    return {
+        "modulo": modulo,
+        "repeticiones": repeticiones,
+        "importar_s": statistics.median(m["importar"] for m in muestras),
+        "primer_motor_s": statistics.median(m["primer_motor"] for m in muestras),
+        "cargados": sorted({nombre for m in muestras for nombre in m["cargados"]}),
+    }
+
+
+def excesos(resultado):
+    """Lista de violaciones del presupuesto para un resultado de medir()."""
+    problemas = [f"{resultado['modulo']} carga {nombre}" for nombre in resultado["cargados"]]
+    for etapa, limite in PRESUPUESTO_S.items():
+        valor = resultado[f"{etapa}_s"]
+        if valor > limite:
+            problemas.append(f"{resultado['modulo']}: {etapa} tardó {valor:.3f} s (presupuesto {limite} s)")
+    return problemas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de los procesos sin ventana.")
+    parser.add_argument("--modulos", nargs="+", default=list(MODULOS))
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    problemas = []
+    print(f"{'módulo':>10} {'importar (s)':>13} {'primer motor (s)':>17}")
+    for modulo in args.modulos:
+        r = medir(modulo, args.repeticiones)
+        resultados.append(r)
+        problemas.extend(excesos(r))
+        print(f"{modulo:>10} {r['importar_s']:>13.3f} {r['primer_motor_s']:>17.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump({"presupuesto_s": PRESUPUESTO_S, "resultados": resultados}, archivo, indent=2)
+
+    for problema in problemas:
+        print(f"FUERA DE PRESUPUESTO: {problema}", file=sys.stderr)
+    sys.exit(1 if problemas else 0)
+
+
+if __name__ == "__main__":
+    main()
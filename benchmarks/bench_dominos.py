@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pymunk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dominos
+
+# Pasos por segundo de pymunk en función del número de dominós.
+# Cada escena es una cadena recta sobre un suelo subdividido; se empuja el
+# primer dominó y se mide el tiempo de `space.step` durante la cascada.
+
+CANTIDADES = (100, 1000, 5000, 10000, 50000)
+ESPACIADO = 20
+DT = 1 / 60.0
+
+
+def construir(num_dominos, ajustado=True):
+    space = pymunk.Space()
+    space.gravity = (0, 980)
+    if ajustado:
+        dominos.configurar_espacio(space, num_dominos)
+
+    largo = (num_dominos + 2) * ESPACIADO
+    suelo = [(0, 500), (largo, 500)]
+    dominos.crear_suelo(space, suelo, largo_maximo=200 if ajustado else largo)
+    posiciones, angulos = dominos.poses_en_polilinea(suelo, ESPACIADO)
+    cuerpos = dominos.crear_cadena_dominos(space, posiciones[:num_dominos], angulos[:num_dominos])
+    cuerpos[0].apply_impulse_at_local_point((40, 0), (0, -dominos.DOMINO_ALTO / 2))
+    return space
+
+
+def medir(num_dominos, pasos, ajustado=True):
+    inicio = time.perf_counter()
+    space = construir(num_dominos, ajustado)
+    construccion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(pasos):
+        space.step(DT)
+    duracion = time.perf_counter() - inicio
+    return {
+        "dominos": num_dominos,
+        "ajustado": ajustado,
+        "construccion_s": construccion,
+        "pasos": pasos,
+        "pasos_por_segundo": pasos / duracion,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de pasos por segundo contra número de dominós.")
+    parser.add_argument("--cantidades", type=int, nargs="+", default=list(CANTIDADES))
+    parser.add_argument("--pasos", type=int, default=300, help="Pasos de física por medición")
+    parser.add_argument("--sin-ajustes", action="store_true",
+                        help="Medir también con el índice por defecto, sin dormir cuerpos ni subdividir el suelo")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    print(f"{'dominós':>8} {'ajustado':>9} {'construcción (s)':>17} {'pasos/s':>10}")
+    for n in args.cantidades:
+        for ajustado in ((True, False) if args.sin_ajustes else (True,)):
+            r = medir(n, args.pasos, ajustado)
+            resultados.append(r)
+            print(f"{n:>8} {str(ajustado):>9} {r['construccion_s']:>17.3f} {r['pasos_por_segundo']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2)
+
+
+if __name__ == "__main__":
+    main()
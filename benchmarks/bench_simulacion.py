@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+# Sin ventana real: pygame dibuja en memoria con el driver dummy de SDL
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pymunk
+
+import escena as escenas
+import main as interfaz
+import motor
+from lienzo import Lienzo, dibujar_forma
+from texto import cache_texto
+
+# Benchmarks de la simulación completa.
+# Mide el paso de física con cadenas de dominós de distinto largo, el costo de
+# dibujar cada frame y sus partes, la contabilidad de energías y el reinicio.
+# En la escena de main.py solo caben motor.MAX_DOMINOS dominós, así que el paso
+# se mide en la escena `dominos` con el suelo alargado para toda la cadena.
+# Los resultados se guardan en JSON para compararlos entre versiones.
+
+CANTIDADES = (5, 100, 1000, 5000)
+DT = motor.DT
+
+
+def cronometrar(funcion, repeticiones, preparar=None):
+    """Mediana y mínimo del tiempo por llamada; `preparar` no entra en la medición."""
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {"mediana_s": statistics.median(tiempos), "minimo_s": min(tiempos), "repeticiones": repeticiones}
+
+
+## Física:
+
+def escena_escalada(num_dominos):
+    """La escena `dominos` con `num_dominos` en fila, todos de pie sobre un suelo subdividido."""
+    descripcion = escenas.cargar_descripcion(os.path.join(escenas.CARPETA_ESCENAS, "dominos.json"))
+    fila = descripcion["dominos"][0]
+    fila["cantidad"] = num_dominos
+    fin = fila["inicio"][0] + (num_dominos + 5) * fila.get("paso", 20)
+    suelo = descripcion["plataformas"][0]
+    suelo["puntos"][-1][0] = max(suelo["puntos"][-1][0], fin)
+    suelo["largo_maximo"] = 200
+    return escenas.cargar(descripcion)
+
+
+def medir_pasos(cantidades, pasos):
+    """Pasos por segundo de space.step y de MotorGoldberg.paso, y costo de lectura y energías, por número de dominós."""
+    resultados = []
+    for n in cantidades:
+        escena = escena_escalada(n)
+        inicio = time.perf_counter()
+        sim = motor.MotorGoldberg(escena=escena)
+        construccion = time.perf_counter() - inicio
+        sim.disparar_resorte()
+
+        inicio = time.perf_counter()
+        for _ in range(pasos):
+            sim.space.step(DT)
+        solo_step = time.perf_counter() - inicio
+
+        sim.energias.reservar(pasos)
+        inicio = time.perf_counter()
+        for _ in range(pasos):
+            sim.paso(DT)
+        paso_completo = time.perf_counter() - inicio
+
+        # Sin series (como en barrido y optimizador) solo queda la cascada
+        sin_series = motor.MotorGoldberg(escena=escena, series=False)
+        sin_series.disparar_resorte()
+        inicio = time.perf_counter()
+        for _ in range(pasos):
+            sin_series.paso(DT)
+        paso_sin_series = time.perf_counter() - inicio
+
+        captura = cronometrar(sim.estado.capturar, pasos)["mediana_s"]
+        energias = cronometrar(sim.calcular_energias, pasos)["mediana_s"]
+
+        resultados.append({
+            "dominos": n,
+            "pasos": pasos,
+            "construccion_s": construccion,
+            "step_por_segundo": pasos / solo_step,
+            "paso_por_segundo": pasos / paso_completo,  # step + eventos + lectura + energías + cascada
+            "paso_sin_series_por_segundo": pasos / paso_sin_series,
+            "captura_s": captura,  # Una lectura del estado con pymunk.batch
+            "energias_s": energias,
+            "energias_por_cuerpo_s": energias / (n + 1),  # Debe mantenerse plano al crecer n
+        })
+    return resultados
+
+
+## Interfaz:
+
+def medir_energias(sim, repeticiones):
+    sim.energias.reservar(len(sim.energias) + repeticiones)
+    return cronometrar(lambda: sim.actualizar_energias(DT), repeticiones)
+
+
+def medir_dibujo(sim, screen, repeticiones):
+    lienzo_hud = Lienzo(screen, sim.dibujar_fondo)  # Solo recibe registros; nunca se termina
+
+    def hud():
+        sim.mostrar_posiciones(lienzo_hud)
+        sim.mostrar_fuerzas(lienzo_hud)
+        sim.mostrar_registros(lienzo_hud)
+
+    def formas():
+        for body in interfaz.space.bodies:
+            for shape in body.shapes:
+                dibujar_forma(screen, shape, interfaz.GRAY, interfaz.BLACK)
+
+    estado = {}
+
+    def frame_para_actualizar():
+        sim.paso_fisico(DT, guardar_estado=True)
+        estado["rects"] = sim.dibujar(screen)
+
+    fondo = pygame.Surface(screen.get_size())
+    sim.dibujar(screen)
+    return {
+        "fondo": cronometrar(lambda: sim.dibujar_fondo(fondo), repeticiones),
+        "frame_completo": cronometrar(lambda: sim.dibujar(screen), repeticiones, preparar=sim.lienzo.invalidar),
+        "frame_en_marcha": cronometrar(lambda: sim.dibujar(screen), repeticiones,
+                                       preparar=lambda: sim.paso_fisico(DT, guardar_estado=True)),
+        "frame_quieto": cronometrar(lambda: sim.dibujar(screen), repeticiones),
+        "texto_hud_sin_cache": cronometrar(hud, repeticiones, preparar=cache_texto.limpiar),
+        "texto_hud_con_cache": cronometrar(hud, repeticiones),
+        "formas_dinamicas": cronometrar(formas, repeticiones),
+        "display_update_sucios": cronometrar(lambda: pygame.display.update(estado["rects"]), repeticiones,
+                                             preparar=frame_para_actualizar),
+        "display_flip": cronometrar(pygame.display.flip, repeticiones),
+    }
+
+
+def medir_reinicio(sim, repeticiones):
+    # Sin energías registradas, setup_inicial no lanza el proceso de la gráfica
+    return cronometrar(sim.setup_inicial, repeticiones, preparar=sim.energias.limpiar)
+
+
+def ejecutar(cantidades, pasos, repeticiones, escena=None):
+    resultados = {
+        "entorno": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "pymunk": pymunk.version,
+            "sdl_videodriver": os.environ.get("SDL_VIDEODRIVER"),
+            "escena": escena,
+        },
+        "pasos": medir_pasos(cantidades, pasos),
+    }
+
+    screen = interfaz.abrir_ventana()
+    inicio = time.perf_counter()
+    sim = interfaz.SimulacionGoldberg(escena)
+    resultados["primer_setup_s"] = time.perf_counter() - inicio  # Construye la escena y la plantilla
+    resultados["reinicio"] = medir_reinicio(sim, repeticiones)
+
+    sim.simulacion_iniciada = True
+    sim.disparar_resorte()
+    resultados["dibujo"] = medir_dibujo(sim, screen, repeticiones)
+    resultados["actualizar_energias"] = medir_energias(sim, repeticiones * 10)
+    sim.energias.limpiar()  # Para que el reinicio final no grafique
+    return resultados
+
+
+def _planos(resultados, prefijo=""):
+    """Aplana los resultados a {ruta: segundos o pasos/s} para comparar."""
+    planos = {}
+    if isinstance(resultados, dict):
+        for clave, valor in resultados.items():
+            if clave == "entorno":
+                continue
+            planos.update(_planos(valor, f"{prefijo}{clave}."))
+    elif isinstance(resultados, list):
+        for fila in resultados:
+            planos.update(_planos(fila, f"{prefijo}{fila.get('dominos', '')}."))
+    elif isinstance(resultados, float):
+        planos[prefijo.rstrip(".")] = resultados
+    return planos
+
+
+def comparar(base, actual):
+    """Imprime el cambio relativo de cada medición respecto de una corrida anterior."""
+    antes, ahora = _planos(base), _planos(actual)
+    for ruta in sorted(set(antes) & set(ahora)):
+        if antes[ruta]:
+            cambio = (ahora[ruta] - antes[ruta]) / antes[ruta] * 100
+            # Más pasos por segundo es mejor; más segundos es peor
+            peor = cambio < 0 if "por_segundo" in ruta else cambio > 0
+            marca = " !" if peor and abs(cambio) > 10 else ""
+            print(f"{ruta:<50} {antes[ruta]:>12.6g} {ahora[ruta]:>12.6g} {cambio:>+8.1f}%{marca}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de física, dibujo, energías y reinicio.")
+    parser.add_argument("--cantidades", type=int, nargs="+", default=list(CANTIDADES),
+                        help="Números de dominós para medir el paso de física")
+    parser.add_argument("--pasos", type=int, default=300, help="Pasos de física por medición")
+    parser.add_argument("--repeticiones", type=int, default=100, help="Repeticiones de cada medición de la interfaz")
+    parser.add_argument("--escena", help="Escena para las mediciones de la interfaz")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior contra el que comparar")
+    args = parser.parse_args(argv)
+
+    resultados = ejecutar(args.cantidades, args.pasos, args.repeticiones, args.escena)
+
+    print(f"{'dominós':>8} {'step/s':>10} {'paso/s':>10} {'energías (µs)':>14} {'por cuerpo (ns)':>16}")
+    for r in resultados["pasos"]:
+        print(f"{r['dominos']:>8} {r['step_por_segundo']:>10.1f} {r['paso_por_segundo']:>10.1f}"
+              f" {r['energias_s'] * 1e6:>14.1f} {r['energias_por_cuerpo_s'] * 1e9:>16.1f}")
+    for nombre, r in resultados["dibujo"].items():
+        print(f"dibujo.{nombre:<24} {r['mediana_s'] * 1000:>8.3f} ms")
+    print(f"actualizar_energias          {resultados['actualizar_energias']['mediana_s'] * 1e6:>8.2f} µs")
+    print(f"setup_inicial (reinicio)     {resultados['reinicio']['mediana_s'] * 1000:>8.3f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            comparar(json.load(archivo), resultados)
+
+
+if __name__ == "__main__":
+    main()
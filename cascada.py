@@ -0,0 +1,162 @@
+import math
+
+import numpy as np
+
+# Análisis de la propagación de la cascada de dominós.
+# En cada paso se leen los ángulos de todos los dominós en un solo arreglo y
+# se comparan con el umbral de caída de forma vectorizada. Con los tiempos de
+# caída se calcula la velocidad del frente y dónde se detuvo la cascada, en el
+# sentido en que avanza: la esfera puede golpear cualquier extremo de la cadena.
+
+ANGULO_CAIDA = math.radians(45)
+
+
+def distancias_a_lo_largo(posiciones):
+    """Distancia acumulada de cada dominó al primero de la lista, siguiendo la cadena."""
+    posiciones = np.asarray(posiciones, dtype=np.float64)
+    if len(posiciones) == 0:
+        return np.zeros(0)
+    pasos = np.hypot(*np.diff(posiciones, axis=0).T)
+    return np.concatenate(([0.0], np.cumsum(pasos)))
+
+
+def tiempos_de_caida(tiempos, angulos, angulos_iniciales=None, umbral=ANGULO_CAIDA):
+    """Tiempo en que cada dominó cruza el umbral, a partir de ángulos (pasos, dominós).
+
+    Sirve para analizar una trayectoria ya registrada; NaN si nunca cayó.
+    """
+    angulos = np.asarray(angulos)
+    if angulos_iniciales is None:
+        angulos_iniciales = angulos[0] if len(angulos) else 0.0
+    caido = np.abs(angulos - angulos_iniciales) >= umbral
+    alguna_vez = caido.any(axis=0)
+    primero = caido.argmax(axis=0)
+    return np.where(alguna_vez, np.asarray(tiempos)[primero], np.nan)
+
+
+def origen_y_sentido(tiempos_caida, tiempos_impacto=None):
+    """Dominó donde empezó la cascada y sentido (+1 o -1) en que avanza por la cadena.
+
+    El origen es el primer dominó golpeado (si se conocen los impactos) o el
+    primero en caer. Desde un extremo la cascada solo puede ir hacia el otro;
+    desde el medio, hacia el vecino que cayó antes (o hacia el tramo más largo).
+    """
+    n = len(tiempos_caida)
+    if not n:
+        return None, 1
+    candidatos = tiempos_caida
+    if tiempos_impacto is not None and not np.isnan(tiempos_impacto).all():
+        candidatos = tiempos_impacto
+    if np.isnan(candidatos).all():
+        return None, 1
+    origen = int(np.nanargmin(candidatos))
+    if origen == 0:
+        return origen, 1
+    if origen == n - 1:
+        return origen, -1
+    antes = np.nan_to_num(tiempos_caida[origen - 1], nan=np.inf)
+    despues = np.nan_to_num(tiempos_caida[origen + 1], nan=np.inf)
+    if antes != despues:
+        return origen, (-1 if antes < despues else 1)
+    return origen, (-1 if origen > n - 1 - origen else 1)
+
+
+def resumen_cascada(tiempos_caida, distancias, tiempos_impacto=None):
+    """Resumen compacto de la cascada a partir de los tiempos de caída.
+
+    La cadena se recorre desde el origen de la cascada en el sentido en que
+    avanza (ver origen_y_sentido); las distancias y la velocidad del frente se
+    miden en ese sentido, así que la velocidad es positiva.
+    """
+    tiempos_caida = np.asarray(tiempos_caida, dtype=np.float64)
+    distancias = np.asarray(distancias, dtype=np.float64)
+    n = len(tiempos_caida)
+    cayo = ~np.isnan(tiempos_caida)
+    num_caidos = int(cayo.sum())
+    origen, sentido = origen_y_sentido(tiempos_caida, tiempos_impacto)
+
+    # La cascada avanza mientras caen dominós consecutivos desde el origen
+    detenida = None
+    recorrido = 0.0
+    velocidad = None
+    if origen is not None:
+        orden = np.arange(origen, n) if sentido > 0 else np.arange(origen, -1, -1)
+        cayo_en_orden = cayo[orden]
+        largo = int(np.argmin(cayo_en_orden)) if not cayo_en_orden.all() else len(orden)
+        if largo < len(orden):
+            detenida = int(orden[largo])
+        tramo = orden[:largo]
+        d = np.abs(distancias[tramo] - distancias[origen])
+        if largo:
+            recorrido = float(d[-1])
+        if largo >= 2:
+            t = tiempos_caida[tramo]
+            if np.ptp(t) > 0:
+                velocidad = float(np.polyfit(t, d, 1)[0])
+    elif n:
+        detenida = 0
+
+    return {
+        "dominos": n,
+        "caidos": num_caidos,
+        "completa": bool(n and cayo.all()),
+        "primera_caida": float(np.nanmin(tiempos_caida)) if num_caidos else None,
+        "ultima_caida": float(np.nanmax(tiempos_caida)) if num_caidos else None,
+        "origen": origen,               # Dominó donde empezó la cascada
+        "sentido": sentido,             # +1 hacia índices crecientes, -1 hacia decrecientes
+        "velocidad_frente": velocidad,  # px/s, ajuste lineal distancia contra tiempo
+        "detenida_en": detenida,        # Primer dominó en pie a partir del origen (None si cayeron todos)
+        "distancia_recorrida": recorrido,
+    }
+
+
+class AnalisisCascada:
+    """Sigue los ángulos de los dominós paso a paso y registra cuándo cae cada uno.
+
+    Los ángulos de cada paso los pone quien llama, de la lectura compartida
+    del estado (ver trayectoria.EstadoCuerpos); aquí no se leen los cuerpos.
+    """
+
+    def __init__(self, dominoes, umbral=ANGULO_CAIDA, impactos=None):
+        self.dominoes = list(dominoes)
+        self.umbral = umbral
+        self.impactos = impactos  # PrimerosImpactos: el primer dominó golpeado orienta la cadena
+        n = len(self.dominoes)
+        self.angulos_iniciales = np.fromiter((b.angle for b in self.dominoes), dtype=np.float64, count=n)
+        self.distancias = distancias_a_lo_largo([tuple(b.position) for b in self.dominoes])
+        self.tiempos_caida = np.full(n, np.nan)
+        self.caidos = 0
+        self._texto = None  # Línea del HUD y cuántos caídos había al armarla
+        self._texto_caidos = -1
+
+    def registrar(self, tiempo, angulos):
+        """Marca los dominós que acaban de caer, con sus ángulos en este paso."""
+        if self.caidos == len(self.dominoes):
+            return
+        nuevos = (np.abs(angulos - self.angulos_iniciales) >= self.umbral) & np.isnan(self.tiempos_caida)
+        if nuevos.any():
+            self.tiempos_caida[nuevos] = tiempo
+            self.caidos += int(nuevos.sum())
+
+    def resumen(self):
+        return resumen_cascada(self.tiempos_caida, self.distancias, self.tiempos_impacto)
+
+    @property
+    def tiempos_impacto(self):
+        return self.impactos.tiempo if self.impactos is not None else None
+
+    def texto(self):
+        """Una línea para el HUD; el resumen solo se recalcula cuando cae otro dominó."""
+        if self._texto_caidos != self.caidos:
+            self._texto = self._armar_texto()
+            self._texto_caidos = self.caidos
+        return self._texto
+
+    def _armar_texto(self):
+        r = self.resumen()
+        texto = f"Cascada: {r['caidos']}/{r['dominos']} caídos"
+        if r["velocidad_frente"] is not None:
+            texto += f", frente a {r['velocidad_frente']:.0f} px/s"
+        if r["caidos"] and r["detenida_en"] is not None:
+            texto += f", en pie desde el {r['detenida_en'] + 1}"
+        return texto
@@ -0,0 +1,136 @@
+import math
+
+import numpy as np
+
+# Colisiones por eventos.
+# Cada forma lleva un collision_type y pymunk llama a los manejadores solo
+# cuando hay contacto, así que no hay que recorrer las formas en cada frame.
+# Los manejadores escriben en una cola preasignada que se vacía después de
+# cada paso.
+
+TIPO_ESFERA = 1
+TIPO_DOMINO = 2
+TIPO_PLATAFORMA = 3
+
+# Clases de evento
+INICIO = 0       # begin: primer contacto de un par (antes del solver: velocidad previa al choque)
+POST = 1         # post_solve del primer paso de contacto (ya con impulso y velocidad resultante)
+
+ESFERA = -1      # Índice de cuerpo para la esfera (los dominós van de 0 en adelante)
+NINGUNO = -2     # Índice para formas estáticas
+
+DTYPE_EVENTO = np.dtype([
+    ("evento", np.int8),
+    ("tiempo", np.float64),
+    ("cuerpo", np.int32),   # Cuerpo al que corresponden posición y velocidad
+    ("otro", np.int32),     # Cuerpo con el que chocó
+    ("x", np.float64),
+    ("y", np.float64),
+    ("vx", np.float64),
+    ("vy", np.float64),
+    ("impulso", np.float64),
+])
+
+
+class ColaEventos:
+    """Cola de eventos de colisión en un arreglo preasignado."""
+
+    def __init__(self, capacidad=4096):
+        self._eventos = np.zeros(capacidad, dtype=DTYPE_EVENTO)
+        self._n = 0
+        self.perdidos = 0   # Eventos descartados por cola llena
+        self.tiempo = 0.0   # Tiempo del paso en curso; lo fija quien llama a space.step
+
+    def __len__(self):
+        return self._n
+
+    def agregar(self, evento, cuerpo, otro, body, impulso=0.0):
+        if self._n == len(self._eventos):
+            self.perdidos += 1
+            return
+        p = body.position
+        v = body.velocity
+        self._eventos[self._n] = (evento, self.tiempo, cuerpo, otro, p.x, p.y, v.x, v.y, impulso)
+        self._n += 1
+
+    def vaciar(self):
+        """Devuelve los eventos pendientes y reinicia la cola.
+
+        El arreglo devuelto es una vista: hay que consumirlo antes del siguiente paso.
+        """
+        eventos = self._eventos[:self._n]
+        self._n = 0
+        return eventos
+
+
+def instalar_manejadores(space, cola, dominoes):
+    """Conecta los manejadores esfera-dominó y dominó-dominó."""
+    indices = {body: i for i, body in enumerate(dominoes)}
+
+    def indice(shape):
+        if shape.collision_type == TIPO_ESFERA:
+            return ESFERA
+        return indices.get(shape.body, NINGUNO)
+
+    def registrar(evento, arbiter, impulso=0.0):
+        a, b = arbiter.shapes
+        ia, ib = indice(a), indice(b)
+        # Un evento por cada participante dinámico, con su propio estado
+        if ia != NINGUNO:
+            cola.agregar(evento, ia, ib, a.body, impulso)
+        if ib != NINGUNO:
+            cola.agregar(evento, ib, ia, b.body, impulso)
+
+    def inicio(arbiter, space, data):
+        registrar(INICIO, arbiter)
+        return True
+
+    def post(arbiter, space, data):
+        if arbiter.is_first_contact:
+            registrar(POST, arbiter, arbiter.total_impulse.length)
+
+    for tipos in ((TIPO_ESFERA, TIPO_DOMINO), (TIPO_DOMINO, TIPO_DOMINO)):
+        manejador = space.add_collision_handler(*tipos)
+        manejador.begin = inicio
+        manejador.post_solve = post
+
+
+class PrimerosImpactos:
+    """Primer impacto de cada dominó: tiempo y posición del contacto, velocidad e impulso tras el solver."""
+
+    def __init__(self, num_dominos):
+        self.tiempo = np.full(num_dominos, np.nan)
+        self.posicion = np.full((num_dominos, 2), np.nan)
+        self.velocidad = np.full((num_dominos, 2), np.nan)
+        self.impulso = np.full(num_dominos, np.nan)
+        self.esfera_toco_dominos = False
+
+    def procesar(self, eventos):
+        """Incorpora los eventos de un paso; devuelve los índices con primer impacto nuevo."""
+        nuevos = []
+        for e in eventos.tolist():
+            evento, tiempo, cuerpo, otro, x, y, vx, vy, impulso = e
+            if cuerpo < 0:
+                continue
+            if otro == ESFERA:
+                self.esfera_toco_dominos = True
+            if evento == INICIO and math.isnan(self.tiempo[cuerpo]):
+                self.tiempo[cuerpo] = tiempo
+                self.posicion[cuerpo] = (x, y)
+                self.velocidad[cuerpo] = (vx, vy)
+                nuevos.append(cuerpo)
+            elif evento == POST and math.isnan(self.impulso[cuerpo]) and tiempo == self.tiempo[cuerpo]:
+                # En begin el solver todavía no actuó: la velocidad es la de reposo
+                self.velocidad[cuerpo] = (vx, vy)
+                self.impulso[cuerpo] = impulso
+        return nuevos
+
+    def registro(self, i):
+        """Registro del dominó i en el formato de domino_records."""
+        return {
+            "domino": i,
+            "tiempo": float(self.tiempo[i]),
+            "posicion": tuple(self.posicion[i]),
+            "velocidad": tuple(self.velocidad[i]),
+            "impulso": float(self.impulso[i]),
+        }
@@ -0,0 +1,70 @@
+import argparse
+import json
+import math
+import os
+import sys
+
+# Piezas comunes de las líneas de comandos sin ventana (motor, barrido,
+# ensamble, optimizador, predicción): argumentos repetidos, tamaño del pool y
+# salida en JSON estricto. No importa pymunk ni NumPy para que cualquier
+# módulo pueda usarlo.
+
+AYUDA_ESCENA = "Archivo de escena (.json/.toml) o nombre de una escena de escenas/"
+
+
+def entero_en_rango(minimo, maximo=None, nota=None):
+    """Tipo de argparse para enteros entre `minimo` y `maximo` (sin tope si es None)."""
+    def tipo(texto):
+        n = int(texto)
+        if n < minimo or (maximo is not None and n > maximo):
+            mensaje = f"entre {minimo} y {maximo}" if maximo is not None else f"debe ser al menos {minimo}"
+            raise argparse.ArgumentTypeError(f"{mensaje} ({nota})" if nota else mensaje)
+        return n
+    return tipo
+
+
+def agregar_escena(parser):
+    parser.add_argument("--escena", help=AYUDA_ESCENA)
+
+
+def agregar_dominos(parser, por_defecto, maximo):
+    parser.add_argument("--dominos", type=entero_en_rango(0, maximo, "para más, usar --escena"),
+                        default=por_defecto, help=f"Número de dominós (sin --escena, hasta {maximo})")
+
+
+def agregar_procesos(parser, para=""):
+    parser.add_argument("--procesos", type=int,
+                        help=f"Procesos del pool{' ' + para if para else ''} (por defecto, todos los núcleos)")
+
+
+def agregar_salida(parser, formato="JSON"):
+    parser.add_argument("--salida", help=f"Archivo {formato} de salida (por defecto, salida estándar)")
+
+
+def num_procesos(procesos=None):
+    """Procesos del pool: los pedidos o, si no, todos los núcleos."""
+    return procesos or os.cpu_count() or 1
+
+
+def a_json(valor):
+    """Resultados con arreglos de NumPy como JSON estricto: NaN e infinitos pasan a null."""
+    if isinstance(valor, dict):
+        return {clave: a_json(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [a_json(v) for v in valor]
+    if hasattr(valor, "tolist"):
+        return a_json(valor.tolist())
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+def escribir_json(resultados, ruta=None):
+    """Escribe los resultados en `ruta` o, sin ruta, en la salida estándar."""
+    resultados = a_json(resultados)
+    if ruta:
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, allow_nan=False)
+    else:
+        json.dump(resultados, sys.stdout, allow_nan=False)
+        sys.stdout.write("\n")
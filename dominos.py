@@ -0,0 +1,169 @@
+import math
+
+import numpy as np
+import pymunk
+
+from colisiones import TIPO_DOMINO, TIPO_PLATAFORMA
+
+# Generación de cadenas de dominós a gran escala.
+# Las poses se calculan con NumPy a lo largo de polilíneas o arcos, los cuerpos
+# se agregan al espacio en una sola llamada y el espacio se ajusta para miles de
+# piezas: índice espacial del tamaño de un dominó, cuerpos dormidos y
+# categorías de colisión.
+
+DOMINO_ANCHO = 10
+DOMINO_ALTO = 60
+DOMINO_MASA = 1
+DOMINO_FRICCION = 0.5
+DOMINOS_ESCENA_GRANDE = 200  # A partir de aquí se ajusta el espacio para cadenas largas
+
+# Categorías de colisión (ShapeFilter)
+CATEGORIA_ESFERA = 0b0001
+CATEGORIA_DOMINO = 0b0010
+CATEGORIA_SUELO = 0b0100
+CATEGORIA_RAMPA = 0b1000
+
+# Un dominó solo puede tocar la esfera, otros dominós y el suelo bajo la cadena.
+# El filtro no evita que el índice espacial proponga el par, pero lo descarta
+# antes del cálculo de contactos.
+FILTRO_DOMINO = pymunk.ShapeFilter(
+    categories=CATEGORIA_DOMINO,
+    mask=CATEGORIA_ESFERA | CATEGORIA_DOMINO | CATEGORIA_SUELO,
+)
+FILTRO_SUELO = pymunk.ShapeFilter(categories=CATEGORIA_SUELO)
+FILTRO_RAMPA = pymunk.ShapeFilter(categories=CATEGORIA_RAMPA)    # Estáticos lejos de los dominós
+FILTRO_ESFERA = pymunk.ShapeFilter(categories=CATEGORIA_ESFERA)
+
+# Parámetros de reposo: un cuerpo quieto durante medio segundo deja el solver
+TIEMPO_PARA_DORMIR = 0.5
+VELOCIDAD_REPOSO = 5.0
+
+
+def poses_en_polilinea(puntos, espaciado, alto=DOMINO_ALTO, grosor_suelo=4):
+    """Posiciones y ángulos de dominós parados cada `espaciado` sobre una polilínea.
+
+    Devuelve (posiciones, angulos) como arreglos de NumPy. Las posiciones son
+    los centros de los dominós, levantados sobre la normal del tramo.
+    """
+    puntos = np.asarray(puntos, dtype=np.float64)
+    tramos = np.diff(puntos, axis=0)
+    largos = np.hypot(tramos[:, 0], tramos[:, 1])
+    acumulado = np.concatenate(([0.0], np.cumsum(largos)))
+
+    s = np.arange(espaciado / 2, acumulado[-1], espaciado)
+    tramo = np.clip(np.searchsorted(acumulado, s, side="right") - 1, 0, len(tramos) - 1)
+    t = (s - acumulado[tramo]) / largos[tramo]
+    base = puntos[tramo] + tramos[tramo] * t[:, None]
+
+    tangente = tramos[tramo] / largos[tramo][:, None]
+    # Normal "hacia arriba" en coordenadas con el eje Y hacia abajo
+    normal = np.stack((tangente[:, 1], -tangente[:, 0]), axis=1)
+    posiciones = base + normal * (alto / 2 + grosor_suelo)
+    angulos = np.arctan2(tangente[:, 1], tangente[:, 0])
+    return posiciones, angulos
+
+
+def puntos_arco(centro, radio, angulo_inicial, angulo_final, num_segmentos=None, largo_segmento=20):
+    """Puntos de una polilínea que aproxima un arco de circunferencia."""
+    if num_segmentos is None:
+        num_segmentos = max(1, int(math.ceil(abs(angulo_final - angulo_inicial) * radio / largo_segmento)))
+    angulos = np.linspace(angulo_inicial, angulo_final, num_segmentos + 1)
+    return np.stack((centro[0] + radio * np.cos(angulos), centro[1] + radio * np.sin(angulos)), axis=1)
+
+
+def poses_en_arco(centro, radio, angulo_inicial, angulo_final, espaciado, alto=DOMINO_ALTO, grosor_suelo=4):
+    """Como poses_en_polilinea, pero sobre un arco de circunferencia."""
+    puntos = puntos_arco(centro, radio, angulo_inicial, angulo_final, largo_segmento=espaciado / 4)
+    return poses_en_polilinea(puntos, espaciado, alto, grosor_suelo)
+
+
+def segmentar(puntos, largo_maximo):
+    """Subdivide una polilínea para que ningún tramo supere `largo_maximo`.
+
+    Un segmento estático muy largo cae en muchas celdas del índice espacial y
+    genera candidatos contra todos los dominós que tiene encima.
+    """
+    puntos = np.asarray(puntos, dtype=np.float64)
+    resultado = [puntos[0]]
+    for a, b in zip(puntos[:-1], puntos[1:]):
+        partes = max(1, int(math.ceil(np.hypot(*(b - a)) / largo_maximo)))
+        for i in range(1, partes + 1):
+            resultado.append(a + (b - a) * (i / partes))
+    return np.array(resultado)
+
+
+def segmentos_bajo_dominos(a, b, posiciones, ancho=DOMINO_ANCHO, alto=DOMINO_ALTO, grosor=4):
+    """Máscara de los segmentos (a[i], b[i]) que algún dominó puede tocar, aun caído.
+
+    Esos llevan FILTRO_SUELO; el resto, FILTRO_RAMPA, que los dominós ignoran.
+    """
+    a, b = np.asarray(a, dtype=np.float64).reshape(-1, 2), np.asarray(b, dtype=np.float64).reshape(-1, 2)
+    posiciones = np.asarray(posiciones, dtype=np.float64).reshape(-1, 2)
+    if not len(posiciones) or not len(a):
+        return np.zeros(len(a), dtype=bool)
+    ab = b - a
+    rel = posiciones[:, None, :] - a
+    t = np.clip((rel * ab).sum(-1) / np.maximum((ab ** 2).sum(-1), 1e-12), 0, 1)
+    distancia = np.hypot(*np.moveaxis(rel - t[..., None] * ab, -1, 0))
+    alcance = math.hypot(ancho, alto) + np.asarray(grosor)
+    return (distancia <= alcance).any(0)
+
+
+def crear_suelo(space, puntos, largo_maximo=200, radio=4, friccion=1.0, elasticidad=0.5):
+    """Agrega una polilínea estática subdividida, con la categoría de suelo."""
+    puntos = segmentar(puntos, largo_maximo)
+    segmentos = []
+    for a, b in zip(puntos[:-1], puntos[1:]):
+        segmento = pymunk.Segment(space.static_body, tuple(a), tuple(b), radio)
+        segmento.friction = friccion
+        segmento.elasticity = elasticidad
+        segmento.filter = FILTRO_SUELO
+        segmento.collision_type = TIPO_PLATAFORMA
+        segmentos.append(segmento)
+    space.add(*segmentos)
+    return segmentos
+
+
+def crear_cadena_dominos(space, posiciones, angulos=None, ancho=DOMINO_ANCHO, alto=DOMINO_ALTO,
+                         masa=DOMINO_MASA, friccion=DOMINO_FRICCION):
+    """Crea un dominó por pose y los agrega al espacio de una sola vez."""
+    momento = pymunk.moment_for_box(masa, (ancho, alto))
+    if angulos is None:
+        angulos = np.zeros(len(posiciones))
+
+    cuerpos = []
+    objetos = []
+    for (x, y), angulo in zip(np.asarray(posiciones).tolist(), np.asarray(angulos).tolist()):
+        body = pymunk.Body(masa, momento)
+        body.position = (x, y)
+        body.angle = angulo
+
+        shape = pymunk.Poly.create_box(body, (ancho, alto))
+        shape.friction = friccion
+        shape.filter = FILTRO_DOMINO
+        shape.collision_type = TIPO_DOMINO
+        cuerpos.append(body)
+        objetos.append(body)
+        objetos.append(shape)
+
+    space.add(*objetos)
+    return cuerpos
+
+
+def configurar_reposo(space):
+    """Deja dormir a los cuerpos quietos: no pasan por el solver hasta que algo los toque."""
+    space.sleep_time_threshold = TIEMPO_PARA_DORMIR
+    space.idle_speed_threshold = VELOCIDAD_REPOSO
+
+
+def en_reposo(space):
+    """True si todos los cuerpos dinámicos del espacio están dormidos."""
+    # La esfera suele ser el primer cuerpo, así que mientras se mueve esto corta enseguida
+    return all(body.is_sleeping for body in space.bodies)
+
+
+def configurar_espacio(space, num_dominos, ancho=DOMINO_ANCHO, alto=DOMINO_ALTO):
+    """Ajusta el espacio para cadenas largas: índice espacial y cuerpos dormidos."""
+    # Celdas del tamaño de un dominó; unas 10 celdas por forma en la tabla hash
+    space.use_spatial_hash(max(ancho, alto), max(1000, 10 * num_dominos))
+    configurar_reposo(space)
@@ -0,0 +1,225 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import comandos
+import escena as escenas
+import motor
+from registro import COLUMNAS_ENERGIA
+
+# Ensambles de Monte Carlo.
+# Se simulan N copias de la escena con los parámetros perturbados al azar
+# (k, x, masa, radio y la fricción de las plataformas). Cada proceso acumula
+# media y varianza por paso de tiempo con el algoritmo de Welford y la
+# distribución del resultado de la cascada; los acumuladores parciales se
+# combinan al llegar, así que la memoria no depende del número de miembros.
+
+SERIES = COLUMNAS_ENERGIA[1:]  # Todas menos el tiempo
+
+# Desviación relativa de cada perturbación (normal, multiplicativa)
+JITTER = {
+    "k": 0.05,
+    "x": 0.05,
+    "masa": 0.05,
+    "radio": 0.05,
+    "friccion": 0.10,
+}
+
+
+class Welford:
+    """Media y varianza en línea, elemento a elemento sobre arreglos de NumPy."""
+
+    def __init__(self, forma=()):
+        self.n = 0
+        self.media = np.zeros(forma)
+        self.m2 = np.zeros(forma)
+
+    def agregar(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (x - self.media)
+
+    def combinar(self, otro):
+        """Une dos acumuladores (fórmula de Chan et al.) sin ver las muestras."""
+        if otro.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.media, self.m2 = otro.n, otro.media.copy(), otro.m2.copy()
+            return self
+        n = self.n + otro.n
+        delta = otro.media - self.media
+        self.media = self.media + delta * (otro.n / n)
+        self.m2 = self.m2 + otro.m2 + delta ** 2 * (self.n * otro.n / n)
+        self.n = n
+        return self
+
+    def varianza(self):
+        """Varianza muestral (n - 1); NaN con menos de dos muestras."""
+        if self.n < 2:
+            return np.full_like(self.media, np.nan)
+        return self.m2 / (self.n - 1)
+
+    def desviacion(self):
+        return np.sqrt(self.varianza())
+
+
+def completar(serie, pasos):
+    """Extiende con el último valor una serie que terminó antes por reposo."""
+    serie = np.asarray(serie, dtype=np.float64)
+    if len(serie) >= pasos or not len(serie):
+        return serie[:pasos]
+    return np.concatenate((serie, np.full(pasos - len(serie), serie[-1])))
+
+
+class Acumulado:
+    """Estadísticas parciales de un lote de miembros del ensamble."""
+
+    def __init__(self, pasos, num_dominos):
+        self.series = {nombre: Welford(pasos) for nombre in SERIES}
+        self.caidos = np.zeros(num_dominos + 1, dtype=np.int64)  # Histograma de dominós caídos
+        self.alcanzo = 0
+        self.completa = 0
+        self.velocidad_frente = Welford()
+        self.energia_mecanica_final = Welford()
+
+    @property
+    def n(self):
+        return int(self.caidos.sum())
+
+    def agregar(self, resultados):
+        for nombre in SERIES:
+            w = self.series[nombre]
+            # Tras el reposo las energías no cambian: se completa con el último valor
+            w.agregar(completar(resultados[nombre], len(w.media)))
+        self.caidos[resultados["dominos_caidos"]] += 1
+        self.alcanzo += bool(resultados["alcanzo_dominos"])
+        cascada = resultados["cascada"]
+        self.completa += bool(cascada["completa"])
+        if cascada["velocidad_frente"] is not None:
+            self.velocidad_frente.agregar(cascada["velocidad_frente"])
+        if resultados["energia_mecanica_final"] is not None:
+            self.energia_mecanica_final.agregar(resultados["energia_mecanica_final"])
+
+    def combinar(self, otro):
+        for nombre in SERIES:
+            self.series[nombre].combinar(otro.series[nombre])
+        self.caidos += otro.caidos
+        self.alcanzo += otro.alcanzo
+        self.completa += otro.completa
+        self.velocidad_frente.combinar(otro.velocidad_frente)
+        self.energia_mecanica_final.combinar(otro.energia_mecanica_final)
+        return self
+
+
+def perturbar(nominal, jitter, rng):
+    """Parámetros de un miembro: cada valor nominal por un factor normal positivo."""
+    parametros = dict(nominal)
+    for nombre in ("k", "x", "masa", "radio"):
+        sigma = jitter.get(nombre, 0)
+        if sigma:
+            parametros[nombre] = nominal[nombre] * max(0.05, 1 + rng.normal(0, sigma))
+    return parametros
+
+
+def perturbar_friccion(space, sigma, rng):
+    """Multiplica la fricción de cada segmento estático por su propio factor."""
+    if not sigma:
+        return
+    for shape in space.static_body.shapes:
+        shape.friction *= max(0.0, 1 + rng.normal(0, sigma))
+
+
+def _ejecutar_lote(argumentos):
+    semilla, miembros, nominal, jitter, duracion, dt, num_dominos, escena = argumentos
+    rng = np.random.default_rng(semilla)
+    plantilla = motor.plantilla_para(escena, num_dominos)
+    pasos = int(round(duracion / dt))
+    acumulado = None
+    for _ in range(miembros):
+        sim = motor.MotorGoldberg(num_dominos=num_dominos, plantilla=plantilla, **perturbar(nominal, jitter, rng))
+        perturbar_friccion(sim.space, jitter.get("friccion", 0), rng)
+        resultados = sim.ejecutar(duracion, dt)
+        if acumulado is None:
+            acumulado = Acumulado(pasos, len(sim.dominoes))
+        # La corrida se descarta en cuanto se incorpora a las estadísticas
+        acumulado.agregar(resultados)
+    return acumulado
+
+
+def ensamble(miembros, nominal=None, jitter=JITTER, duracion=10.0, dt=motor.DT, num_dominos=motor.NUM_DOMINOS,
+             escena=None, procesos=None, semilla=None, tamano_lote=None):
+    """Simula `miembros` copias perturbadas en paralelo y devuelve sus estadísticas combinadas."""
+    if miembros < 1:
+        raise ValueError("El ensamble necesita al menos un miembro")
+    if nominal is None:
+        nominal = escenas.cargar(escena).parametros() if escena else dict(motor.PARAMETROS_POR_DEFECTO)
+    procesos = comandos.num_procesos(procesos)
+    tamano_lote = tamano_lote or max(1, min(64, miembros // (procesos * 4)))
+    lotes = [tamano_lote] * (miembros // tamano_lote)
+    if miembros % tamano_lote:
+        lotes.append(miembros % tamano_lote)
+    # Una secuencia de semillas independiente por lote: el resultado no depende del reparto
+    semillas = np.random.SeedSequence(semilla).spawn(len(lotes))
+
+    total = None
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [pool.submit(_ejecutar_lote, (s, m, nominal, jitter, duracion, dt, num_dominos, escena))
+                   for s, m in zip(semillas, lotes)]
+        for futuro in as_completed(futuros):
+            parcial = futuro.result()
+            total = parcial if total is None else total.combinar(parcial)
+    return resumen(total, dt, nominal, jitter)
+
+
+def resumen(acumulado, dt, nominal, jitter):
+    """Bandas por paso de tiempo y distribución del resultado de la cascada."""
+    n = acumulado.n
+    pasos = len(acumulado.series[SERIES[0]].media)
+    bandas = {}
+    for nombre, w in acumulado.series.items():
+        bandas[nombre] = {"media": w.media, "desviacion": w.desviacion()}
+    return {
+        "miembros": n,
+        "nominal": nominal,
+        "jitter": jitter,
+        "tiempo": dt * np.arange(1, pasos + 1),
+        "series": bandas,
+        "dominos_caidos": acumulado.caidos,
+        "probabilidad_alcanzo": acumulado.alcanzo / n,
+        "probabilidad_completa": acumulado.completa / n,
+        "velocidad_frente": {"n": acumulado.velocidad_frente.n,
+                             "media": float(acumulado.velocidad_frente.media),
+                             "desviacion": float(acumulado.velocidad_frente.desviacion())},
+        "energia_mecanica_final": {"media": float(acumulado.energia_mecanica_final.media),
+                                   "desviacion": float(acumulado.energia_mecanica_final.desviacion())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ensamble de Monte Carlo de la máquina de Goldberg.")
+    parser.add_argument("--miembros", type=comandos.entero_en_rango(1), default=1000, help="Número de corridas perturbadas")
+    comandos.agregar_escena(parser)
+    comandos.agregar_dominos(parser, motor.NUM_DOMINOS, motor.MAX_DOMINOS)
+    for nombre, sigma in JITTER.items():
+        parser.add_argument(f"--jitter-{nombre}", type=float, default=sigma,
+                            help=f"Desviación relativa de {nombre} (por defecto {sigma})")
+    parser.add_argument("--duracion", type=float, default=10.0, help="Tiempo simulado por corrida (s)")
+    parser.add_argument("--dt", type=float, default=motor.DT, help="Paso de integración (s)")
+    parser.add_argument("--semilla", type=int, help="Semilla para reproducir el ensamble")
+    comandos.agregar_procesos(parser)
+    comandos.agregar_salida(parser)
+    args = parser.parse_args(argv)
+
+    jitter = {nombre: getattr(args, f"jitter_{nombre}") for nombre in JITTER}
+    resultados = ensamble(args.miembros, jitter=jitter, duracion=args.duracion, dt=args.dt,
+                          num_dominos=args.dominos, escena=args.escena, procesos=args.procesos,
+                          semilla=args.semilla)
+
+    comandos.escribir_json(resultados, args.salida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pymunk
+
+import dominos
+from colisiones import TIPO_ESFERA, TIPO_PLATAFORMA
+
+# Escenas declarativas.
+# Una escena (JSON o TOML) describe plataformas, arcos, esfera, resorte,
+# dominós y materiales. Se compila a arreglos de NumPy (segmentos ya
+# teselados, poses de los dominós) y el resultado se guarda en disco con el
+# hash de la descripción, para que las escenas grandes carguen rápido.
+
+VERSION_COMPILADOR = 3
+CARPETA_ESCENAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "escenas")
+CARPETA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_escenas")
+
+MATERIAL_POR_DEFECTO = {"friccion": 1.0, "elasticidad": 0.5}
+MATERIAL_DOMINO = {"friccion": dominos.DOMINO_FRICCION, "masa": dominos.DOMINO_MASA}
+
+SLIDERS_POR_DEFECTO = {
+    "k": {"min": 0, "max": 15, "inicial": 7.5},
+    "x": {"min": 0, "max": 15, "inicial": 7.5},
+    "masa": {"min": 0.5, "max": 5, "inicial": 1},
+    "radio": {"min": 10, "max": 40, "inicial": 20},
+    "gravedad": {"min": 0, "max": 2000, "inicial": 980},
+}
+
+
+def cargar_descripcion(ruta):
+    """Lee una escena desde un archivo .json o .toml."""
+    if ruta.endswith(".toml"):
+        import tomllib
+        with open(ruta, "rb") as archivo:
+            return tomllib.load(archivo)
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def hash_descripcion(descripcion):
+    texto = json.dumps(descripcion, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{VERSION_COMPILADOR}:{texto}".encode("utf-8")).hexdigest()
+
+
+def _material(descripcion, nombre, por_defecto=MATERIAL_POR_DEFECTO):
+    material = dict(por_defecto)
+    material.update(descripcion.get("materiales", {}).get(nombre, {}))
+    return material
+
+
+def _poses_dominos(grupo):
+    tipo = grupo.get("tipo", "fila")
+    alto = grupo.get("alto", dominos.DOMINO_ALTO)
+    if tipo == "fila":
+        x0, y0 = grupo["inicio"]
+        n = grupo["cantidad"]
+        posiciones = np.empty((n, 2))
+        posiciones[:, 0] = x0 + np.arange(n) * grupo.get("paso", 20)
+        posiciones[:, 1] = y0
+        return posiciones, np.zeros(n)
+    if tipo == "polilinea":
+        posiciones, angulos = dominos.poses_en_polilinea(grupo["puntos"], grupo["espaciado"], alto)
+    elif tipo == "arco":
+        posiciones, angulos = dominos.poses_en_arco(grupo["centro"], grupo["radio"], grupo["angulo_inicial"],
+                                                    grupo["angulo_final"], grupo["espaciado"], alto)
+    else:
+        raise ValueError(f"Tipo de grupo de dominós desconocido: {tipo}")
+    if "cantidad" in grupo:
+        posiciones, angulos = posiciones[:grupo["cantidad"]], angulos[:grupo["cantidad"]]
+    return posiciones, angulos
+
+
+class EscenaCompilada:
+    """Geometría lista para construir el espacio: arreglos + parámetros escalares."""
+
+    def __init__(self, arreglos, meta):
+        self.arreglos = arreglos
+        self.meta = meta
+
+    @classmethod
+    def compilar(cls, descripcion):
+        segmentos = []  # (ax, ay, bx, by, grosor, friccion, elasticidad)
+        grupo_segmento = []  # Índice de la plataforma o arco de cada segmento (ver meta["grupos_segmentos"])
+        grupos_segmentos = []
+
+        for plataforma in descripcion.get("plataformas", []):
+            material = _material(descripcion, plataforma.get("material", "plataforma"))
+            puntos = np.asarray(plataforma["puntos"], dtype=np.float64)
+            if "largo_maximo" in plataforma:
+                puntos = dominos.segmentar(puntos, plataforma["largo_maximo"])
+            grosor = plataforma.get("grosor", 4)
+            for a, b in zip(puntos[:-1], puntos[1:]):
+                segmentos.append((*a, *b, grosor, material["friccion"], material["elasticidad"]))
+                grupo_segmento.append(len(grupos_segmentos))
+            grupos_segmentos.append({"tipo": "plataforma", "material": plataforma.get("material", "plataforma")})
+
+        for arco in descripcion.get("arcos", []):
+            material = _material(descripcion, arco.get("material", "rampa"))
+            puntos = dominos.puntos_arco(arco["centro"], arco["radio"], arco["angulo_inicial"],
+                                         arco["angulo_final"], num_segmentos=arco.get("segmentos"))
+            grosor = arco.get("grosor", 4)
+            for a, b in zip(puntos[:-1], puntos[1:]):
+                segmentos.append((*a, *b, grosor, material["friccion"], material["elasticidad"]))
+                grupo_segmento.append(len(grupos_segmentos))
+            grupos_segmentos.append({"tipo": "arco", "material": arco.get("material", "rampa"),
+                                     "centro": list(arco["centro"]), "radio": arco["radio"],
+                                     "angulo_inicial": arco["angulo_inicial"], "angulo_final": arco["angulo_final"]})
+
+        posiciones, angulos, grupos_indice, grupos = [], [], [], []
+        for i, grupo in enumerate(descripcion.get("dominos", [])):
+            p, a = _poses_dominos(grupo)
+            posiciones.append(p)
+            angulos.append(a)
+            grupos_indice.append(np.full(len(p), i, dtype=np.int32))
+            material = _material(descripcion, grupo.get("material", "domino"), MATERIAL_DOMINO)
+            grupos.append({
+                "ancho": grupo.get("ancho", dominos.DOMINO_ANCHO),
+                "alto": grupo.get("alto", dominos.DOMINO_ALTO),
+                "masa": material["masa"],
+                "friccion": material["friccion"],
+            })
+
+        segmentos = np.array(segmentos, dtype=np.float64).reshape(-1, 7)
+        posiciones = np.concatenate(posiciones) if posiciones else np.zeros((0, 2))
+        alto = max((g["alto"] for g in grupos), default=dominos.DOMINO_ALTO)
+        ancho = max((g["ancho"] for g in grupos), default=dominos.DOMINO_ANCHO)
+        arreglos = {
+            "segmentos": segmentos,
+            # Segmentos que algún dominó puede tocar (filtro de suelo; el resto, de rampa)
+            "segmentos_suelo": dominos.segmentos_bajo_dominos(segmentos[:, 0:2], segmentos[:, 2:4], posiciones,
+                                                              ancho, alto, segmentos[:, 4]),
+            "segmentos_grupo": np.array(grupo_segmento, dtype=np.int32),
+            "dominos_posicion": posiciones,
+            "dominos_angulo": np.concatenate(angulos) if angulos else np.zeros(0),
+            "dominos_grupo": np.concatenate(grupos_indice) if grupos_indice else np.zeros(0, dtype=np.int32),
+        }
+
+        sliders = {nombre: dict(valores) for nombre, valores in SLIDERS_POR_DEFECTO.items()}
+        for nombre, valores in descripcion.get("sliders", {}).items():
+            sliders[nombre].update(valores)
+        esfera = descripcion.get("esfera", {})
+        resorte = descripcion.get("resorte", {})
+        meta = {
+            "nombre": descripcion.get("nombre", ""),
+            "grupos_dominos": grupos,
+            "grupos_segmentos": grupos_segmentos,
+            "esfera": {
+                "apoyo": esfera.get("apoyo", [50, 202]),
+                "material": _material(descripcion, esfera.get("material", "esfera")),
+            },
+            "resorte": {
+                "posicion": resorte.get("posicion", [10, 200]),
+                "largo": resorte.get("largo", 30),
+                "impulso_maximo": resorte.get("impulso_maximo", 1200),
+            },
+            "sliders": sliders,
+        }
+        return cls(arreglos, meta)
+
+    def guardar(self, ruta):
+        directorio = os.path.dirname(ruta)
+        os.makedirs(directorio, exist_ok=True)
+        # Un temporal propio de cada proceso: los procesos de un pool pueden
+        # compilar la misma escena a la vez con la caché vacía
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".npz")
+        try:
+            with os.fdopen(descriptor, "wb") as archivo:
+                np.savez(archivo, meta=np.array(json.dumps(self.meta)), **self.arreglos)
+            os.replace(temporal, ruta)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+    @classmethod
+    def abrir(cls, ruta):
+        with np.load(ruta) as datos:
+            meta = json.loads(str(datos["meta"]))
+            arreglos = {clave: datos[clave] for clave in datos.files if clave != "meta"}
+        return cls(arreglos, meta)
+
+    # Valores iniciales de los parámetros, según los sliders de la escena
+    def parametros(self):
+        return {nombre: valores["inicial"] for nombre, valores in self.meta["sliders"].items()}
+
+    @property
+    def num_dominos(self):
+        return len(self.arreglos["dominos_posicion"])
+
+    @property
+    def apoyo_esfera(self):
+        return tuple(self.meta["esfera"]["apoyo"])
+
+    @property
+    def impulso_maximo(self):
+        return self.meta["resorte"]["impulso_maximo"]
+
+
+def compilar(descripcion, carpeta_cache=CARPETA_CACHE):
+    """Compila la escena, reutilizando la versión en disco si el hash coincide."""
+    ruta = os.path.join(carpeta_cache, hash_descripcion(descripcion) + ".npz")
+    if os.path.exists(ruta):
+        try:
+            return EscenaCompilada.abrir(ruta)
+        except (OSError, ValueError, KeyError):
+            pass  # Caché corrupta: se vuelve a compilar
+    compilada = EscenaCompilada.compilar(descripcion)
+    compilada.guardar(ruta)
+    return compilada
+
+
+def cargar(escena, carpeta_cache=CARPETA_CACHE):
+    """Acepta una ruta, el nombre de una escena incluida, una descripción o una escena compilada."""
+    if isinstance(escena, EscenaCompilada):
+        return escena
+    if isinstance(escena, str):
+        if not os.path.exists(escena):
+            escena = os.path.join(CARPETA_ESCENAS, escena + ".json")
+        escena = cargar_descripcion(escena)
+    return compilar(escena, carpeta_cache)
+
+
+def construir_espacio(compilada, masa=None, radio=None, gravedad=None):
+    """Construye el espacio de la escena y devuelve (space, cuerpo, forma, dominoes)."""
+    parametros = compilada.parametros()
+    masa = parametros["masa"] if masa is None else masa
+    radio = parametros["radio"] if radio is None else radio
+    gravedad = parametros["gravedad"] if gravedad is None else gravedad
+
+    space = pymunk.Space()
+    space.gravity = (0, gravedad)
+    dominos.configurar_reposo(space)
+    if compilada.num_dominos >= dominos.DOMINOS_ESCENA_GRANDE:
+        dominos.configurar_espacio(space, compilada.num_dominos)
+
+    segmentos = []
+    suelo = compilada.arreglos["segmentos_suelo"].tolist()
+    for (ax, ay, bx, by, grosor, friccion, elasticidad), es_suelo in zip(compilada.arreglos["segmentos"].tolist(),
+                                                                         suelo):
+        segmento = pymunk.Segment(space.static_body, (ax, ay), (bx, by), grosor)
+        segmento.friction = friccion
+        segmento.elasticity = elasticidad
+        segmento.filter = dominos.FILTRO_SUELO if es_suelo else dominos.FILTRO_RAMPA
+        segmento.collision_type = TIPO_PLATAFORMA
+        segmentos.append(segmento)
+    space.add(*segmentos)
+
+    material = compilada.meta["esfera"]["material"]
+    cuerpo = pymunk.Body(masa, pymunk.moment_for_circle(masa, 0, radio))
+    apoyo_x, apoyo_y = compilada.apoyo_esfera
+    cuerpo.position = (apoyo_x, apoyo_y - radio)
+    forma = pymunk.Circle(cuerpo, radio)
+    forma.friction = material["friccion"]
+    forma.elasticity = material["elasticidad"]
+    forma.filter = dominos.FILTRO_ESFERA
+    forma.collision_type = TIPO_ESFERA
+    space.add(cuerpo, forma)
+
+    dominoes = []
+    posiciones = compilada.arreglos["dominos_posicion"]
+    angulos = compilada.arreglos["dominos_angulo"]
+    grupo_de = compilada.arreglos["dominos_grupo"]
+    for i, grupo in enumerate(compilada.meta["grupos_dominos"]):
+        en_grupo = grupo_de == i
+        dominoes.extend(dominos.crear_cadena_dominos(space, posiciones[en_grupo], angulos[en_grupo], **grupo))
+    return space, cuerpo, forma, dominoes
@@ -0,0 +1,114 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from trayectoria import NUM_COLUMNAS, capturar_estado
+
+# Grabación de trayectorias a disco mientras corre la simulación.
+# Formato: "GOLDTRAY" + longitud de la cabecera (uint32, little endian) +
+# cabecera JSON que describe las filas, rellena hasta múltiplo de 64 bytes.
+# Después vienen las filas, una por paso: tiempo (float64) seguido del estado
+# (x, y, vx, vy, ángulo, omega) de cada cuerpo. Se escriben en bloques, así
+# que la memoria usada no depende de la duración de la corrida.
+
+MAGIA = b"GOLDTRAY"
+VERSION = 1
+COLUMNAS = ("x", "y", "vx", "vy", "angulo", "omega")
+ALINEACION = 64
+
+
+def dtype_filas(num_cuerpos):
+    return np.dtype([("tiempo", "<f8"), ("estados", "<f8", (num_cuerpos, NUM_COLUMNAS))])
+
+
+class GrabadorTrayectoria:
+    """Escribe el estado de los cuerpos paso a paso en un archivo binario."""
+
+    def __init__(self, ruta, cuerpos, metadatos=None, filas_por_bloque=1024):
+        self.ruta = ruta
+        self.cuerpos = list(cuerpos)
+        self.dtype = dtype_filas(len(self.cuerpos))
+        self._bloque = np.zeros(filas_por_bloque, dtype=self.dtype)
+        self._n = 0
+        self.filas = 0
+
+        cabecera = {
+            "version": VERSION,
+            "num_cuerpos": len(self.cuerpos),
+            "columnas": COLUMNAS,
+            "dtype": self.dtype.descr,
+            "masas": [b.mass for b in self.cuerpos],
+            "momentos": [b.moment for b in self.cuerpos],
+            "metadatos": metadatos or {},
+        }
+        texto = json.dumps(cabecera).encode("utf-8")
+        largo = len(MAGIA) + 4 + len(texto)
+        texto += b" " * (-largo % ALINEACION)
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._archivo = open(ruta, "wb")
+        self._archivo.write(MAGIA)
+        self._archivo.write(struct.pack("<I", len(texto)))
+        self._archivo.write(texto)
+
+    def registrar(self, tiempo, estado=None):
+        """Copia el estado actual de todos los cuerpos; vacía el bloque cuando se llena.
+
+        Si se da `estado` (ya leído en este paso, ver EstadoCuerpos) se copia
+        ese en lugar de volver a leer los cuerpos.
+        """
+        fila = self._bloque[self._n]
+        fila["tiempo"] = tiempo
+        if estado is not None:
+            fila["estados"][...] = estado
+        else:
+            capturar_estado(self.cuerpos, fila["estados"])
+        self._n += 1
+        if self._n == len(self._bloque):
+            self.vaciar()
+
+    def vaciar(self):
+        if self._n:
+            self._bloque[:self._n].tofile(self._archivo)
+            self.filas += self._n
+            self._n = 0
+        self._archivo.flush()
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self.vaciar()
+            self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def leer_cabecera(ruta):
+    """Devuelve (cabecera, desplazamiento de los datos) de un archivo de trayectoria."""
+    with open(ruta, "rb") as archivo:
+        if archivo.read(len(MAGIA)) != MAGIA:
+            raise ValueError(f"{ruta} no es un archivo de trayectoria")
+        (largo,) = struct.unpack("<I", archivo.read(4))
+        cabecera = json.loads(archivo.read(largo))
+    return cabecera, len(MAGIA) + 4 + largo
+
+
+def abrir_trayectoria(ruta):
+    """Abre un archivo de trayectoria sin copiarlo: devuelve (cabecera, memmap de filas).
+
+    Las filas se pueden leer aunque la grabación siga en curso; solo se ven
+    los bloques ya escritos.
+    """
+    cabecera, desplazamiento = leer_cabecera(ruta)
+    dtype = dtype_filas(cabecera["num_cuerpos"])
+    filas = (os.path.getsize(ruta) - desplazamiento) // dtype.itemsize
+    if filas == 0:
+        return cabecera, np.zeros(0, dtype=dtype)
+    return cabecera, np.memmap(ruta, dtype=dtype, mode="r", offset=desplazamiento, shape=(filas,))
@@ -0,0 +1,98 @@
+import numpy as np
+import pygame
+
+# Gráfica de energías dentro de la ventana de pygame.
+# Cada columna de píxeles guarda el mínimo y el máximo de las muestras que le
+# tocan (decimación min/max). Cuando se llenan todas las columnas se fusionan
+# de a pares y cada columna pasa a cubrir el doble de muestras, así que agregar
+# una muestra es O(1) y dibujar cuesta lo mismo sin importar la duración.
+
+SERIES = (
+    ("energia_cinetica", (0, 0, 255)),
+    ("energia_potencial_gravitacional", (0, 160, 0)),
+    ("energia_potencial_elastica", (255, 140, 0)),
+    ("energia_mecanica", (128, 0, 128)),
+)
+
+
+class GraficaEnVivo:
+    """Gráfica incremental de varias series decimadas al ancho en píxeles."""
+
+    def __init__(self, rect, series=SERIES, fondo=(255, 255, 255), borde=(0, 0, 0)):
+        self.rect = pygame.Rect(rect)
+        self.rect.width -= self.rect.width % 2  # Ancho par para poder fusionar columnas de a pares
+        self.series = series
+        self.fondo = fondo
+        self.borde = borde
+        self.superficie = pygame.Surface(self.rect.size)
+        self.limpiar()
+
+    def limpiar(self):
+        ancho = self.rect.width
+        self._min = np.full((len(self.series), ancho), np.inf)
+        self._max = np.full((len(self.series), ancho), -np.inf)
+        self._columna = 0              # Columna que se está llenando
+        self._muestras_columna = 0     # Muestras ya acumuladas en esa columna
+        self._por_columna = 1          # Muestras que cubre cada columna
+        self._y_min = np.inf
+        self._y_max = -np.inf
+        self.version = 0               # Cambia con cada muestra; sirve de firma para el lienzo
+        self._version_dibujada = -1
+
+    def agregar(self, *valores):
+        """Agrega una muestra (un valor por serie, en el orden de SERIES)."""
+        if self._muestras_columna == self._por_columna:
+            self._columna += 1
+            self._muestras_columna = 0
+            if self._columna == self.rect.width:
+                self._compactar()
+
+        c = self._columna
+        for i, valor in enumerate(valores):
+            if valor < self._min[i, c]:
+                self._min[i, c] = valor
+            if valor > self._max[i, c]:
+                self._max[i, c] = valor
+            if valor < self._y_min:
+                self._y_min = valor
+            if valor > self._y_max:
+                self._y_max = valor
+        self._muestras_columna += 1
+        self.version += 1
+
+    def _compactar(self):
+        """Fusiona columnas de a pares: la mitad izquierda queda con todo el historial."""
+        mitad = self.rect.width // 2
+        usadas = 2 * mitad
+        self._min[:, :mitad] = np.minimum(self._min[:, 0:usadas:2], self._min[:, 1:usadas:2])
+        self._max[:, :mitad] = np.maximum(self._max[:, 0:usadas:2], self._max[:, 1:usadas:2])
+        self._min[:, mitad:] = np.inf
+        self._max[:, mitad:] = -np.inf
+        self._columna = mitad
+        self._por_columna *= 2
+
+    def dibujar_en(self, superficie):
+        """Dibuja la gráfica; la superficie interna solo se regenera si hay datos nuevos."""
+        if self._version_dibujada != self.version:
+            self._regenerar()
+            self._version_dibujada = self.version
+        superficie.blit(self.superficie, self.rect)
+
+    def _regenerar(self):
+        s = self.superficie
+        s.fill(self.fondo)
+        ancho, alto = self.rect.size
+        columnas = self._columna + 1 if self.version else 0
+        if columnas and self._y_max > self._y_min:
+            escala = (alto - 4) / (self._y_max - self._y_min)
+            x = np.repeat(np.arange(columnas), 2)
+            for i, (_, color) in enumerate(self.series):
+                # Zigzag mínimo/máximo por columna: una sola llamada por serie
+                y = np.empty(2 * columnas)
+                y[0::2] = self._min[i, :columnas]
+                y[1::2] = self._max[i, :columnas]
+                y = (alto - 2) - (y - self._y_min) * escala
+                puntos = np.stack((x, y), axis=1).tolist()
+                if len(puntos) > 1:
+                    pygame.draw.lines(s, color, False, puntos)
+        pygame.draw.rect(s, self.borde, s.get_rect(), 1)
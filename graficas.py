@@ -0,0 +1,86 @@
+import atexit
+import json
+import os
+import subprocess
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# Gráficas de energía en un proceso aparte.
+# Las series se copian una sola vez a memoria compartida y el proceso hijo las
+# grafica con matplotlib, así la ventana de la simulación no se bloquea en
+# plt.show(). matplotlib solo se importa en el proceso que grafica.
+
+# Procesos de gráfica vivos y la memoria compartida que usan
+_pendientes = []
+
+
+def graficar_energias(datos, bloquear=True):
+    """Grafica las series de energía de un arreglo estructurado (ver registro.py)."""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(datos["tiempo"], datos["energia_cinetica"], label="Energía Cinética", color="blue")
+    plt.plot(datos["tiempo"], datos["energia_potencial_gravitacional"], label="Energía Potencial Gravitacional", color="green")
+    plt.plot(datos["tiempo"], datos["energia_mecanica"], label="Energía Mecánica", color="purple")
+    plt.title("Energías durante la simulación")
+    plt.xlabel("Tiempo (s)")
+    plt.ylabel("Energía (J)")
+    plt.legend()
+    plt.grid(True)
+    plt.show(block=bloquear)
+
+
+def _proceso_grafica(nombre, descr, filas):
+    memoria = shared_memory.SharedMemory(name=nombre)
+    # En un intérprete nuevo el resource_tracker registra la memoria al
+    # abrirla y la borraría al salir; la borra solo el proceso que la creó
+    resource_tracker.unregister(memoria._name, "shared_memory")
+    try:
+        descr = [tuple(campo) for campo in descr]
+        datos = np.ndarray(filas, dtype=np.dtype(descr), buffer=memoria.buf).copy()
+    finally:
+        memoria.close()
+    graficar_energias(datos)
+
+
+def limpiar_terminados():
+    """Libera la memoria compartida de las gráficas que ya se cerraron."""
+    for proceso, memoria in list(_pendientes):
+        if proceso.poll() is not None:
+            memoria.close()
+            memoria.unlink()
+            _pendientes.remove((proceso, memoria))
+
+
+def graficar_en_segundo_plano(datos):
+    """Lanza la gráfica de `datos` en otro proceso y regresa de inmediato."""
+    limpiar_terminados()
+    if not len(datos):
+        return None
+
+    datos = np.ascontiguousarray(datos)
+    memoria = shared_memory.SharedMemory(create=True, size=datos.nbytes)
+    np.ndarray(datos.shape, dtype=datos.dtype, buffer=memoria.buf)[:] = datos
+
+    # Intérprete nuevo que solo importa este módulo: no hereda el estado de
+    # SDL/pygame ni vuelve a ejecutar el script principal
+    argumentos = json.dumps([memoria.name, datos.dtype.descr, len(datos)])
+    proceso = subprocess.Popen([sys.executable, os.path.abspath(__file__), argumentos])
+    _pendientes.append((proceso, memoria))
+    return proceso
+
+
+@atexit.register
+def _cerrar_todo():
+    # Las ventanas de gráfica se cierran junto con la simulación
+    for proceso, _ in _pendientes:
+        if proceso.poll() is None:
+            proceso.terminate()
+        proceso.wait()
+    limpiar_terminados()
+
+
+if __name__ == "__main__":
+    _proceso_grafica(*json.loads(sys.argv[1]))
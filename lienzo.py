@@ -0,0 +1,155 @@
+import pygame
+import pymunk
+
+# Dibujo por capas con rectángulos sucios.
+# La geometría estática se pinta una sola vez en una superficie de fondo.
+# En cada frame solo se registran los elementos dinámicos (cuerpos, textos
+# del HUD, perillas) y se repintan únicamente los que cambiaron, restaurando
+# el fondo bajo su posición anterior y actualizando solo esas regiones. Si
+# cambió demasiado, se repinta todo de una vez.
+
+MAX_SUCIOS = 64          # Con más rectángulos sucios se repinta la pantalla completa
+FRACCION_MAXIMA = 0.5    # ... o si cubren más de esta fracción de la pantalla
+
+
+class Lienzo:
+    """Pantalla con fondo precalculado y actualización por rectángulos sucios."""
+
+    def __init__(self, screen, dibujar_fondo):
+        self.screen = screen
+        self.dibujar_fondo = dibujar_fondo
+        self.fondo = None
+        self._anteriores = {}  # clave -> (firma, rect) del frame anterior
+        self._elementos = {}   # clave -> (firma, rect, dibujar) del frame actual
+
+    def invalidar(self):
+        """Fuerza a repintar el fondo y la pantalla completa en el próximo frame."""
+        self.fondo = None
+
+    def _preparar_fondo(self):
+        self.fondo = pygame.Surface(self.screen.get_size()).convert()
+        self.dibujar_fondo(self.fondo)
+
+    def texto(self, clave, superficie, pos):
+        """Registra una superficie de texto; la misma superficie no se vuelve a pintar."""
+        rect = superficie.get_rect(topleft=pos)
+        self._elementos[clave] = (superficie, rect, lambda s: s.blit(superficie, rect))
+
+    def forma(self, clave, firma, rect, dibujar):
+        """Registra un elemento dinámico; se repinta cuando cambia su firma o su rect."""
+        self._elementos[clave] = (firma, pygame.Rect(rect), dibujar)
+
+    def _repintar_todo(self, elementos):
+        self.screen.blit(self.fondo, (0, 0))
+        for _, _, dibujar in elementos.values():
+            dibujar(self.screen)
+        return [self.screen.get_rect()]
+
+    def terminar(self):
+        """Pinta lo que cambió y devuelve los rectángulos a actualizar en pantalla."""
+        elementos, self._elementos = self._elementos, {}
+        anteriores = self._anteriores
+        self._anteriores = {clave: (firma, rect) for clave, (firma, rect, _) in elementos.items()}
+
+        if self.fondo is None:
+            self._preparar_fondo()
+            return self._repintar_todo(elementos)
+
+        sucios = []
+        for clave, (firma, rect) in anteriores.items():
+            actual = elementos.get(clave)
+            if actual is None:
+                sucios.append(rect)
+            elif actual[0] is not firma and actual[0] != firma or actual[1] != rect:
+                sucios.append(rect)
+                sucios.append(actual[1])
+        for clave, (_, rect, _) in elementos.items():
+            if clave not in anteriores:
+                sucios.append(rect)
+
+        # Con muchas regiones (o muy grandes) sale más barato repintar todo
+        if len(sucios) > MAX_SUCIOS:
+            return self._repintar_todo(elementos)
+        pantalla = self.screen.get_rect()
+        sucios = _fusionar(r.clip(pantalla) for r in sucios if r.colliderect(pantalla))
+        if sum(r.w * r.h for r in sucios) > FRACCION_MAXIMA * pantalla.w * pantalla.h:
+            return self._repintar_todo(elementos)
+
+        # Se restaura el fondo de cada región y se repinta, recortado a ella, todo
+        # lo que la toca; fuera de las regiones sucias la pantalla no cambió
+        rects = [rect for _, rect, _ in elementos.values()]
+        dibujos = [dibujar for _, _, dibujar in elementos.values()]
+        for region in sucios:
+            self.screen.blit(self.fondo, region, region)
+        for region in sucios:
+            indices = region.collidelistall(rects)
+            if indices:
+                self.screen.set_clip(region)
+                for i in indices:
+                    dibujos[i](self.screen)
+        self.screen.set_clip(None)
+        return sucios
+
+
+def _fusionar(rects):
+    """Une los rectángulos que se superponen, para no pintar dos veces la misma zona."""
+    fusionados = []
+    for rect in rects:
+        rect = rect.copy()
+        i = rect.collidelist(fusionados)
+        while i != -1:
+            rect.union_ip(fusionados.pop(i))
+            i = rect.collidelist(fusionados)
+        fusionados.append(rect)
+    return fusionados
+
+
+def _a_mundo(shape, transformacion):
+    """Función local -> mundo del cuerpo, o de una (posición, ángulo) dada."""
+    if transformacion is None:
+        return shape.body.local_to_world
+    posicion, angulo = transformacion
+    return lambda v: pymunk.Vec2d(*v).rotated(angulo) + posicion
+
+
+def rect_forma(shape, transformacion=None):
+    """Rectángulo de pantalla que cubre una forma de pymunk."""
+    if transformacion is None:
+        bb = shape.bb
+    elif isinstance(shape, pymunk.Poly):
+        a_mundo = _a_mundo(shape, transformacion)
+        puntos = [a_mundo(v) for v in shape.get_vertices()]
+        xs = [p.x for p in puntos]
+        ys = [p.y for p in puntos]
+        bb = pymunk.BB(min(xs), min(ys), max(xs), max(ys))
+    else:
+        bb = shape.bb
+        # Se desplaza la caja actual a la posición interpolada
+        dx, dy = transformacion[0] - shape.body.position
+        bb = pymunk.BB(bb.left + dx, bb.bottom + dy, bb.right + dx, bb.top + dy)
+    return pygame.Rect(int(bb.left) - 2, int(bb.bottom) - 2,
+                       int(bb.right - bb.left) + 5, int(bb.top - bb.bottom) + 5)
+
+
+def dibujar_forma(superficie, shape, color, color_borde=None, transformacion=None):
+    """Dibuja un Segment, Circle o Poly de pymunk con las primitivas de pygame.
+
+    Con `transformacion` (posición, ángulo) se dibuja en esa pose en lugar de
+    la del cuerpo, por ejemplo para interpolar entre dos pasos de física.
+    """
+    a_mundo = _a_mundo(shape, transformacion)
+    if isinstance(shape, pymunk.Segment):
+        a = a_mundo(shape.a)
+        b = a_mundo(shape.b)
+        radio = max(1, int(shape.radius))
+        pygame.draw.line(superficie, color, a, b, 2 * radio)
+        pygame.draw.circle(superficie, color, (int(a.x), int(a.y)), radio)
+        pygame.draw.circle(superficie, color, (int(b.x), int(b.y)), radio)
+    elif isinstance(shape, pymunk.Circle):
+        centro = a_mundo(shape.offset)
+        pygame.draw.circle(superficie, color, (int(centro.x), int(centro.y)), int(shape.radius))
+    elif isinstance(shape, pymunk.Poly):
+        puntos = [a_mundo(v) for v in shape.get_vertices()]
+        pygame.draw.polygon(superficie, color, puntos)
+        if color_borde is not None:
+            pygame.draw.polygon(superficie, color_borde, puntos, 1)
@@ -1,27 +1,42 @@
+import argparse
 import pygame
 import pymunk
 import sys
 from pymunk import Vec2d
-from pymunk.pygame_util import DrawOptions
-import math
-import matplotlib.pyplot as plt
+import os
+import time
+
+import graficas
+from cascada import AnalisisCascada
+from colisiones import ColaEventos, PrimerosImpactos, instalar_manejadores
+import dominos
+import motor
+import escena as escenas
+from registro import RegistroEnergias
+from texto import fuente, render_texto
+from lienzo import Lienzo, dibujar_forma, rect_forma
+from reloj import RelojFisico
+from trayectoria import ANGULO, EnergiasSistema, EstadoCuerpos
+from grabador import GrabadorTrayectoria
+from grafica_en_vivo import GraficaEnVivo
+from perfil import perfil
 
 ## Cosas a mejorar: 
 
 # Todo lo relacionado a los dominós.
 # Las medidas de energía.
 
-# Inicialización de pygame y pymunk
-pygame.init()
+# Interfaz: el modelo físico vive en motor.py y escena.py, el dibujo en
+# lienzo.py, texto.py y grafica_en_vivo.py. Importar este módulo no abre la
+# ventana ni inicializa pygame; eso pasa en abrir_ventana(), desde main().
 WIDTH = 1280
 HEIGHT = 720
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Máquina de Goldberg - Simulación")
+TITULO = "Máquina de Goldberg - Simulación"
+screen = None
 
-# Configuración del espacio físico
+# Configuración del espacio físico (setup_inicial lo reemplaza por la escena)
 space = pymunk.Space()
 space.gravity = (0, 980)
-draw_options = DrawOptions(screen)
 
 # Colores
 BLACK = (0, 0, 0)
@@ -30,12 +45,35 @@ RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 GREEN = (0, 255, 0)
 GRAY = (200, 200, 200)
+STATIC_GRAY = (127, 127, 127)  # Color de las formas estáticas (como en debug_draw)
+
+# Carpeta donde se graba la trayectoria de cada corrida
+CARPETA_CORRIDAS = "corridas"
+
+# Tope de filas del registro de energías (una hora a 60 FPS) para corridas largas
+CAPACIDAD_MAXIMA_ENERGIAS = 60 * 60 * 60
+
+# Sin simulación en marcha el bucle se bloquea esperando eventos hasta este tiempo
+TIEMPO_ESPERA_MS = 500
+
+# Registros de impacto visibles en el HUD (los más recientes)
+MAX_REGISTROS_HUD = 20
 
 # Origen dinámico
 custom_origin = [0, HEIGHT]  # Inicialmente en la esquina inferior izquierda
 fixed_origin = None  # Una vez iniciado, se fija aquí
 
 
+def abrir_ventana(titulo=TITULO):
+    """Inicializa pygame y abre la ventana la primera vez que se llama."""
+    global screen
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(titulo)
+    return screen
+
+
 # Funciones de transformación de coordenadas
 def pymunk_to_pygame(p):
     """Transforma coordenadas de Pymunk a Pygame según el origen."""
@@ -84,14 +122,13 @@ def fix_origin():
 
         
 # Dibujar el marco de referencia
-def draw_reference_frame():
+def draw_reference_frame(surface=None):
     """Dibuja los ejes X e Y del marco de referencia dinámico."""
-    origin = fixed_origin if fixed_origin else custom_origin
-    pygame.draw.line(screen, RED, pymunk_to_pygame((0, 0)), pymunk_to_pygame((WIDTH, 0)), 2)  # Eje X
-    pygame.draw.line(screen, GREEN, pymunk_to_pygame((0, 0)), pymunk_to_pygame((0, HEIGHT)), 2)  # Eje Y
-    font = pygame.font.Font(None, 24)
-    origin_text = font.render(f"Origen: ({custom_origin[0]}, {custom_origin[1]})", True, BLACK)
-    screen.blit(origin_text, (10, 10))
+    surface = surface or screen
+    pygame.draw.line(surface, RED, pymunk_to_pygame((0, 0)), pymunk_to_pygame((WIDTH, 0)), 2)  # Eje X
+    pygame.draw.line(surface, GREEN, pymunk_to_pygame((0, 0)), pymunk_to_pygame((0, HEIGHT)), 2)  # Eje Y
+    origin_text = render_texto(fuente(24), f"Origen: ({custom_origin[0]}, {custom_origin[1]})", BLACK)
+    surface.blit(origin_text, (10, 10))
 
 
 class Slider:
@@ -121,10 +158,16 @@ class Slider:
             self.value = self.initial_val
         self.knob.centerx = self.get_knob_pos()
             
-    def draw(self, screen, font):
+    def draw_track(self, screen):
         pygame.draw.rect(screen, GRAY, self.rect)
+
+    def draw_knob(self, screen):
         pygame.draw.rect(screen, BLACK, self.knob)
-        label_text = font.render(f"{self.label}: {self.value:.1f}", True, BLACK)
+
+    def draw(self, screen, font):
+        self.draw_track(screen)
+        self.draw_knob(screen)
+        label_text = render_texto(font, f"{self.label}: {self.value:.1f}", BLACK)
         screen.blit(label_text, (self.rect.x, self.rect.y - 30))
 
 class Button:
@@ -137,49 +180,81 @@ class Button:
     def draw(self, screen, font):
         color = GREEN if self.clicked else RED
         pygame.draw.rect(screen, color, self.rect)
-        text_surface = font.render(self.text, True, BLACK)
+        text_surface = render_texto(font, self.text, BLACK)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
 class SimulacionGoldberg:
-    def __init__(self):
-        self.font = pygame.font.Font(None, 36)
-        
-        self.puntos_plataforma_inicial = [
-            (50, 200),
-            (200, 200)
-        ]        
-        self.puntos_plataforma_media = [
-            (200, 202),
-            (400, 350),
-            (500, 350)
-        ]
-        
-        self.puntos_plataforma2 = [
-            (700, 300),
-            (400, 550),
-            (100, 550)
-        ]
-        
-        self.slider_k = Slider(50, 50, 200, 10, 0, 15, 7.5, "K (N/m)")  
-        self.slider_x = Slider(500, 50, 200, 10, 0, 15, 7.5, "X (m)")           
-        self.slider_masa = Slider(50, 150, 200, 10, 0.5, 5, 1, "Masa")
-        self.slider_radio = Slider(500, 150, 200, 10, 10, 40, 20, "Radio")
-        self.slider_gravedad = Slider(900, 150, 200, 10, 0, 2000, 980, "Gravedad")
+    def __init__(self, escena=None, grabar=False):
+        self.font = fuente(36)
+        # Grabar la trayectoria de cada corrida en CARPETA_CORRIDAS (--grabar o F5)
+        self.grabar = grabar
+
+        # Escena declarativa (ver escena.py); sin ella se usa la escena de motor.py
+        self.escena = escenas.cargar(escena) if escena is not None else None
+        if self.escena is None:
+            self.puntos_plataforma_inicial = list(motor.PUNTOS_PLATAFORMA_INICIAL)
+            self.puntos_plataforma_media = list(motor.PUNTOS_PLATAFORMA_MEDIA)
+            self.puntos_plataforma2 = list(motor.PUNTOS_PLATAFORMA2)
+            rangos = escenas.SLIDERS_POR_DEFECTO
+            self.apoyo = motor.APOYO_ESFERA
+            self.impulso_maximo = motor.IMPULSO_MAXIMO
+            self.resorte_base = Vec2d(10, 200)
+            self.resorte_length = 30
+        else:
+            # Las plataformas de la escena se dibujan desde los segmentos estáticos del espacio
+            self.puntos_plataforma_inicial = []
+            self.puntos_plataforma_media = []
+            self.puntos_plataforma2 = []
+            rangos = self.escena.meta["sliders"]
+            self.apoyo = self.escena.apoyo_esfera
+            self.impulso_maximo = self.escena.impulso_maximo
+            self.resorte_base = Vec2d(*self.escena.meta["resorte"]["posicion"])
+            self.resorte_length = self.escena.meta["resorte"]["largo"]
+
+        def slider(x, y, nombre, etiqueta):
+            r = rangos[nombre]
+            return Slider(x, y, 200, 10, r["min"], r["max"], r["inicial"], etiqueta)
+
+        self.slider_k = slider(50, 50, "k", "K (N/m)")
+        self.slider_x = slider(500, 50, "x", "X (m)")
+        self.slider_masa = slider(50, 150, "masa", "Masa")
+        self.slider_radio = slider(500, 150, "radio", "Radio")
+        self.slider_gravedad = slider(900, 150, "gravedad", "Gravedad")
+        self.sliders = [self.slider_k, self.slider_x, self.slider_masa, self.slider_radio, self.slider_gravedad]
         self.start_button = Button(50, HEIGHT - 100, 100, 40, "Iniciar")
         self.reset_button = Button(50, HEIGHT - 50, 100, 40, "Reiniciar")
         
         self.simulacion_iniciada = False
         self.simulacion_pausada = False
+        self.simulacion_terminada = False  # Todo quedó en reposo: ya no se avanza la física
         self.resorte_disparado = False
+        # Cambios de sliders que se aplican una vez por frame (ver aplicar_sliders)
+        self.esfera_pendiente = False
+        self.gravedad_pendiente = False
         self.dominoes = []
         self.domino_records = []
+        self.eventos = ColaEventos()
+        self.impactos = None
+        self.cascada = None
         self.tiempo_actual = 0
-        self.tiempo_datos = []
-        self.energia_potencial_elastica_datos = []
-        self.energia_cinetica_datos = []
-        self.energia_potencial_gravitacional_datos = []
-        self.energia_mecanica_datos = []
+        self.energias = RegistroEnergias(capacidad_maxima=CAPACIDAD_MAXIMA_ENERGIAS)
+        self.estado = None  # Estado de la esfera y los dominós, leído una vez por paso
+        self.sistema = None  # Energías de la esfera y los dominós (ver calcular_energias)
+        self.energias_actuales = None  # (cinética, gravitacional) del último paso de física
+        self.lienzo = None
+        self.plantilla = None  # Escena inicial ya construida (ver setup_inicial)
+        self.grabador = None
+        # Gráfica de energías en la ventana, junto al texto de energías
+        self.grafica = GraficaEnVivo((180, 575, 340, 100))
+        # Pose de cada cuerpo antes del último paso, para interpolar el dibujo
+        self.estado_anterior = {}
+        self.alpha = 1.0
+        self.reloj = RelojFisico(motor.DT)
+        # Desglose de tiempos por frame (F3) y cuándo se calculó por última vez
+        self.mostrar_perfil = False
+        self.desglose = []
+        self.desglose_frame = 0
         
         self.setup_inicial()
 
@@ -193,37 +268,24 @@ class SimulacionGoldberg:
         energia_potencial_elastica = 0.5 * k * (x ** 2)
         return energia_potencial_elastica
 
-    def calcular_energia_potencial_gravitacional(self):
-        """Calcula la energía potencial gravitacional de la esfera."""
-        m = self.cuerpo.mass  # Masa de la esfera
-        g = self.slider_gravedad.value / 100 # Gravedad ajustada
-
-        # Determinar la altura relativa al marco, sin limitar a valores positivos
-        if fixed_origin:
-            h = (fixed_origin[1] - self.cuerpo.position[1]) - self.slider_radio.value - 8
-        else:
-            h = (custom_origin[1] - self.cuerpo.position[1]) - self.slider_radio.value - 8
-
-        return m * g * h
+    def calcular_energias(self):
+        """Energías cinética (traslación + rotación) y gravitacional de la esfera y los dominós.
 
-# Puse el / 10 xd porque yolo
-
-    def calcular_energia_cinetica(self):
-        """Calcula la energía cinética de la esfera."""
-        v = self.cuerpo.velocity.length / 10 # Escalar la velocidad
-        m = self.cuerpo.mass
-        return 0.5 * m * (v ** 2)
-
-    def calcular_energia_mecanica(self):
-        """Calcula la energía mecánica total del sistema."""
-        return self.calcular_energia_cinetica() + self.calcular_energia_potencial_elastica() + self.calcular_energia_potencial_gravitacional()
+        Usa el último estado capturado en `self.estado`. El desglose por cuerpo
+        queda en `self.sistema.por_cuerpo`.
+        """
+        origin = fixed_origin if fixed_origin else custom_origin
+        # La esfera mide su altura relativa al marco; cada dominó, desde su pose inicial
+        self.sistema.y_referencia[0] = origin[1] - self.slider_radio.value - 8
+        traslacion, rotacion, gravitacional = self.sistema.calcular(self.slider_gravedad.value)
+        return traslacion + rotacion, gravitacional
 
 
     def calcular_fuerza(self):
         k = self.slider_k.value
         x = self.slider_x.value
         energia = 0.5 * k * (x ** 2)
-        energia = min(energia, 1200)
+        energia = min(energia, self.impulso_maximo)
         return energia
 
     def calcular_peso(self):
@@ -232,63 +294,102 @@ class SimulacionGoldberg:
     def actualizar_energias(self, delta_t):
         """Actualizar las energías con el marco fijo."""
         self.tiempo_actual += delta_t
-        energia_cinetica = self.calcular_energia_cinetica()
+        energia_cinetica, energia_potencial_gravitacional = self.energias_actuales = self.calcular_energias()
         energia_potencial_elastica = self.calcular_energia_potencial_elastica()
-        energia_potencial_gravitacional = self.calcular_energia_potencial_gravitacional()
-        energia_mecanica = self.calcular_energia_mecanica()
-
+        energia_mecanica = energia_cinetica + energia_potencial_elastica + energia_potencial_gravitacional
 
         # Almacenar datos para graficar
-        self.energia_cinetica_datos.append(energia_cinetica)
-        self.energia_potencial_elastica_datos.append(energia_potencial_elastica)
-        self.energia_potencial_gravitacional_datos.append(energia_potencial_gravitacional)
-        self.energia_mecanica_datos.append(energia_mecanica)
-        self.tiempo_datos.append(self.tiempo_actual)
-
+        self.energias.agregar(
+            self.tiempo_actual,
+            energia_cinetica,
+            energia_potencial_elastica,
+            energia_potencial_gravitacional,
+            energia_mecanica,
+        )
+        self.grafica.agregar(energia_cinetica, energia_potencial_gravitacional, energia_potencial_elastica, energia_mecanica)
+
+
+    def paso_fisico(self, dt, guardar_estado=False):
+        """Avanza la física un paso fijo y registra las energías."""
+        if guardar_estado:
+            self.estado_anterior = {body: (body.position, body.angle) for body in space.bodies}
+        self.eventos.tiempo = self.tiempo_actual + dt
+        with perfil.span("space.step"):
+            space.step(dt)
+        # Primeros impactos de cada dominó, a partir de los eventos de colisión del paso
+        with perfil.span("colisiones"):
+            for i in self.impactos.procesar(self.eventos.vaciar()):
+                self.domino_records.append(self.impactos.registro(i))
+        # Una sola lectura de los cuerpos para energías, cascada y grabador
+        with perfil.span("captura"):
+            estado = self.estado.capturar()
+        with perfil.span("actualizar_energias"):
+            self.actualizar_energias(dt)
+        with perfil.span("cascada"):
+            self.cascada.registrar(self.tiempo_actual, estado[1:, ANGULO])
+        if self.grabador is not None:
+            with perfil.span("grabador"):
+                self.grabador.registrar(self.tiempo_actual, estado)
+
+    def avanzar(self, tiempo_real):
+        """Consume el tiempo real del frame en pasos fijos según la escala de tiempo."""
+        pasos = self.reloj.avanzar(tiempo_real)
+        for i in range(pasos):
+            self.paso_fisico(self.reloj.dt, guardar_estado=(i == pasos - 1))
+        self.alpha = self.reloj.alpha
+        if pasos and self.resorte_disparado and dominos.en_reposo(space):
+            self.terminar_simulacion()
+
+    def terminar_simulacion(self):
+        """Todos los cuerpos duermen: se deja de llamar a space.step y se cierra la grabación."""
+        self.simulacion_terminada = True
+        self.terminar_grabacion()
+        self.estado_anterior = {}  # Sin interpolación: se dibuja la pose final
+
+    def pose_interpolada(self, body):
+        """Posición y ángulo del cuerpo interpolados entre los dos últimos pasos."""
+        anterior = self.estado_anterior.get(body)
+        if anterior is None:
+            return body.position, body.angle
+        pos, angulo = anterior
+        a = self.alpha
+        return pos + (body.position - pos) * a, angulo + (body.angle - angulo) * a
 
 ## Funciones para mostrar información:
 
-    def mostrar_posiciones(self, screen):
+    def mostrar_posiciones(self, lienzo):
         """Mostrar las posiciones de los objetos con base en el origen fijo."""
         pos_esfera = pymunk_to_pygame(self.cuerpo.position)
-        pos_texto = self.font.render(f"Posición Esfera: ({pos_esfera[0]/10}, {pos_esfera[1]})", True, BLACK)
-        screen.blit(pos_texto, (WIDTH - 500, 350))
+        pos_texto = render_texto(self.font, f"Posición Esfera: ({pos_esfera[0]/10}, {pos_esfera[1]})", BLACK)
+        lienzo.texto("pos_esfera", pos_texto, (WIDTH - 500, 350))
 
-        # Mostrar posiciones de los dominós
-        for i, domino in enumerate(self.dominoes):
-            pos_domino = pymunk_to_pygame(domino.position)
-            pos_texto = self.font.render(f"Posición Domino {i+1}: ({pos_domino[0]/10}, {pos_domino[1]})", True, BLACK)
-            screen.blit(pos_texto, (WIDTH - 500, 400 + i * 20))
+        # Resumen de la cascada en una línea, en lugar de una línea por dominó
+        cascada_texto = render_texto(self.font, self.cascada.texto(), BLACK)
+        lienzo.texto("cascada", cascada_texto, (WIDTH - 500, 400))
 
 
-    def mostrar_fuerzas(self, screen):
+    def mostrar_fuerzas(self, lienzo):
         """Mostrar las fuerzas actuales en pantalla."""
         fuerza_resorte = self.calcular_fuerza()
         peso = self.calcular_peso()
         
-        fuerza_texto = self.font.render(f"Fuerza Resorte: {fuerza_resorte:.1f} N", True, BLACK)
-        screen.blit(fuerza_texto, (WIDTH - 300, 200))
+        fuerza_texto = render_texto(self.font, f"Fuerza Resorte: {fuerza_resorte:.1f} N", BLACK)
+        lienzo.texto("fuerza_resorte", fuerza_texto, (WIDTH - 300, 200))
         
-        peso_texto = self.font.render(f"Peso: {peso:.1f} N", True, BLACK)
-        screen.blit(peso_texto, (WIDTH - 300, 250))
+        peso_texto = render_texto(self.font, f"Peso: {peso:.1f} N", BLACK)
+        lienzo.texto("peso", peso_texto, (WIDTH - 300, 250))
 
     
 
-    def mostrar_registros(self, screen):
+    def mostrar_registros(self, lienzo):
         y_pos = 50
-        for i, record in enumerate(self.domino_records):
-            tiempo = f"Domino {i+1} - T: {record['tiempo']:.2f}s"
+        # Solo los últimos: con cadenas largas el resto quedaría fuera de la pantalla
+        for i, record in enumerate(self.domino_records[-MAX_REGISTROS_HUD:]):
+            tiempo = f"Domino {record['domino']+1} - T: {record['tiempo']:.2f}s"
             pos = f"Pos: ({record['posicion'][0]:.1f}, {record['posicion'][1]:.1f})"
             vel = f"Vel: ({record['velocidad'][0]:.1f}, {record['velocidad'][1]:.1f})"
-            texto = self.font.render(f"{tiempo} | {pos} | {vel}", True, BLACK)
-            screen.blit(texto, (700, y_pos + i * 30))
-
-    def detectar_colisiones(self):
-        """Detectar colisiones y mostrar información ajustada al origen fijo."""
-        for shape in space.shapes:
-            if hasattr(shape, "body") and shape.body.is_sleeping:
-                pos = pymunk_to_pygame(shape.body.position)
-                print(f"Colisión detectada en posición: {pos}")
+            texto = render_texto(self.font, f"{tiempo} | {pos} | {vel}", BLACK)
+            lienzo.texto(("registro", i), texto, (700, y_pos + i * 30))
 
     def limpiar_espacio(self):
         for body in space.bodies:
@@ -299,83 +400,20 @@ class SimulacionGoldberg:
         space.gravity = (0, self.slider_gravedad.value)
 
     def graficar_energias(self):
-        """Graficar las energías almacenadas y guardarlas en un archivo CSV."""
-        if not self.tiempo_datos:
+        """Graficar las energías almacenadas en otro proceso, sin detener la simulación."""
+        if not len(self.energias):
             return
-
-        # Graficar las energías
-        plt.figure(figsize=(10, 6))
-        plt.plot(self.tiempo_datos, self.energia_cinetica_datos, label="Energía Cinética", color="blue")
-        plt.plot(self.tiempo_datos, self.energia_potencial_gravitacional_datos, label="Energía Potencial Gravitacional", color="green")
-        plt.plot(self.tiempo_datos, self.energia_mecanica_datos, label="Energía Mecánica", color="purple")
-        plt.title("Energías durante la simulación")
-        plt.xlabel("Tiempo (s)")
-        plt.ylabel("Energía (J)")
-        plt.legend()
-        plt.grid(True)
-        plt.show()
+        graficas.graficar_en_segundo_plano(self.energias.datos())
 
 ## Objetos:
 
 # Superficie de contacto:
 
     def crear_suelo(self):
-        segmento = pymunk.Segment(
-            space.static_body,
-            self.puntos_plataforma_inicial[0],      
-            self.puntos_plataforma_inicial[1],    
-            4
-        )
-        segmento.friction = 10.0
-        segmento.elasticity = 0.5
-        space.add(segmento)
-        
-        for i in range(len(self.puntos_plataforma_media)-1):
-            segmento = pymunk.Segment(
-                space.static_body,
-                self.puntos_plataforma_media[i],      
-                self.puntos_plataforma_media[i+1],    
-                4
-            )
-            segmento.friction = 10.0
-            segmento.elasticity = 0.5
-            space.add(segmento)
-        
-        for i in range(len(self.puntos_plataforma2)-1):
-            segmento = pymunk.Segment(
-                space.static_body,
-                self.puntos_plataforma2[i],      
-                self.puntos_plataforma2[i+1],    
-                4
-            )
-            segmento.friction = 1.0
-            segmento.elasticity = 0.5
-            space.add(segmento)
+        motor.crear_suelo(space, self.puntos_plataforma_inicial, self.puntos_plataforma_media, self.puntos_plataforma2)
 
     def crear_plataforma_circular(self):
-        center = (645, 215)
-        radius = 100
-        start_angle = 1
-        end_angle = -2.5
-        
-        num_segments = 20
-        points = []
-        for i in range(num_segments + 1):
-            angle = start_angle + (end_angle - start_angle) * (i / num_segments)
-            x = center[0] + radius * math.cos(angle)
-            y = center[1] + radius * math.sin(angle)
-            points.append((x, y))
-        
-        for i in range(len(points) - 1):
-            segment = pymunk.Segment(
-                space.static_body,
-                points[i],
-                points[i + 1],
-                4
-            )
-            segment.friction = 1.0
-            segment.elasticity = 0.5
-            space.add(segment)
+        motor.crear_plataforma_circular(space)
 
 ## Objetos de interacción.
 
@@ -388,22 +426,24 @@ class SimulacionGoldberg:
             if self.forma in space.shapes:
                 space.remove(self.forma)
             
-        momento = pymunk.moment_for_circle(self.slider_masa.value, 0, self.slider_radio.value)
-        self.cuerpo = pymunk.Body(self.slider_masa.value, momento)
-        self.cuerpo.position = (50, 202 - self.slider_radio.value)
-        
-        self.forma = pymunk.Circle(self.cuerpo, self.slider_radio.value)
-        self.forma.friction = 1.0
-        self.forma.elasticity = 0.5
-        self.forma.collision_type = 0  # Tipo de colisión para la esfera
-        
-        space.add(self.cuerpo, self.forma)
+        self.cuerpo, self.forma = motor.crear_esfera(space, self.slider_masa.value, self.slider_radio.value)
+
+    def aplicar_sliders(self):
+        """Aplica los cambios pendientes de los sliders, como mucho una vez por frame."""
+        if self.esfera_pendiente:
+            # Se modifican el cuerpo y la forma existentes en lugar de recrearlos
+            motor.ajustar_esfera(self.cuerpo, self.forma, self.slider_masa.value, self.slider_radio.value, self.apoyo)
+            space.reindex_shapes_for_body(self.cuerpo)
+            self.sistema.refrescar()
+            self.esfera_pendiente = False
+        if self.gravedad_pendiente:
+            space.gravity = (0, self.slider_gravedad.value)
+            self.gravedad_pendiente = False
 
 # Obstaculo 
 
     def crear_resorte(self):
-        self.resorte_pos = Vec2d(10, 200 - self.slider_radio.value)
-        self.resorte_length = 30
+        self.resorte_pos = Vec2d(self.resorte_base.x, self.resorte_base.y - self.slider_radio.value)
 
     def crear_resorte_2(self):
         self.resorte_pos = Vec2d(10, 50 - self.slider_radio.value)
@@ -411,27 +451,18 @@ class SimulacionGoldberg:
 
     def crear_dominos(self):
         self.dominoes.clear()
-        domino_width = 10
-        domino_height = 60
-        spacing = 10
-        x_pos = 150
-        y_pos = 515
-        num_dominos = 5  # Número de dominós
-
-        for i in range(num_dominos):
-            body = pymunk.Body(1, pymunk.moment_for_box(1, (domino_width, domino_height)))
-            body.position = (x_pos + i * (domino_width + spacing), y_pos)
-
-            shape = pymunk.Poly.create_box(body, (domino_width, domino_height))
-            shape.friction = 0.5
-            space.add(body, shape)
-            self.dominoes.append(body)
+        self.dominoes.extend(motor.crear_dominos(space))
 
         #self.dominoes[0].angle = math.radians(0)
 
+    def dibujar_base_resorte(self, screen):
+        pygame.draw.rect(screen, BLACK, (self.resorte_base.x - 10, self.resorte_base.y - 50, 20, 50))
+
+    def rect_resorte(self):
+        """Región que ocupa el zigzag del resorte."""
+        return pygame.Rect(self.resorte_pos.x, self.resorte_pos.y - 20, self.resorte_length, 40).inflate(4, 4)
+
     def dibujar_resorte(self, screen):
-        pygame.draw.rect(screen, BLACK, (0, 150, 20, 50))
-        
         if not self.resorte_disparado:
             start_pos = self.resorte_pos
             end_pos = Vec2d(start_pos.x + self.resorte_length, start_pos.y)
@@ -460,200 +491,369 @@ class SimulacionGoldberg:
                                (points[i].x, points[i].y),
                                (points[i+1].x, points[i+1].y), 2)
     
+    def iniciar_grabacion(self):
+        """Empieza a grabar la trayectoria de la esfera y los dominós en CARPETA_CORRIDAS, si está activado."""
+        self.terminar_grabacion()
+        if not self.grabar:
+            return
+        ruta = os.path.join(CARPETA_CORRIDAS, time.strftime("corrida_%Y%m%d_%H%M%S.tray"))
+        metadatos = {slider.label: slider.value for slider in self.sliders}
+        self.grabador = GrabadorTrayectoria(ruta, [self.cuerpo] + self.dominoes, metadatos=metadatos)
+
+    def terminar_grabacion(self):
+        if self.grabador is not None:
+            self.grabador.cerrar()
+            self.grabador = None
+
     def disparar_resorte(self):
         if not self.resorte_disparado:
             impulso = self.calcular_fuerza()
             self.cuerpo.apply_impulse_at_local_point((impulso, 0))
             self.resorte_disparado = True
 
-    def dibujar(self, screen):
-        screen.fill(WHITE)
-        draw_reference_frame()  # Dibuja el marco de referencia
+    def dibujar_fondo(self, superficie):
+        """Capa estática: se pinta una sola vez y se reutiliza en cada frame."""
+        superficie.fill(WHITE)
+        draw_reference_frame(superficie)  # Dibuja el marco de referencia
         # Dibujar plataformas
-        pygame.draw.line(
-            screen, 
-            BLACK, 
-            self.puntos_plataforma_inicial[0],
-            self.puntos_plataforma_inicial[1],
-            4
-        )
-        
-        for i in range(len(self.puntos_plataforma_media)-1):
-            pygame.draw.line(
-                screen, 
-                BLACK, 
-                self.puntos_plataforma_media[i],
-                self.puntos_plataforma_media[i+1],
-                4
-            )
-        
-        for i in range(len(self.puntos_plataforma2)-1):
-            pygame.draw.line(
-                screen, 
-                BLACK, 
-                self.puntos_plataforma2[i],
-                self.puntos_plataforma2[i+1],
-                4
-            )
-        
+        for puntos in (self.puntos_plataforma_inicial, self.puntos_plataforma_media, self.puntos_plataforma2):
+            for i in range(len(puntos)-1):
+                pygame.draw.line(superficie, BLACK, puntos[i], puntos[i+1], 4)
+
+        # Segmentos estáticos del espacio (plataformas y rampa circular)
+        for shape in space.static_body.shapes:
+            dibujar_forma(superficie, shape, STATIC_GRAY)
+
+        for slider in self.sliders:
+            slider.draw_track(superficie)
+        self.dibujar_base_resorte(superficie)
+
+    def dibujar(self, screen):
+        """Registra los elementos dinámicos del frame y devuelve las regiones a actualizar."""
+        if self.lienzo is None or self.lienzo.screen is not screen:
+            self.lienzo = Lienzo(screen, self.dibujar_fondo)
+        lienzo = self.lienzo
+
+        with perfil.span("controles"):
+            self.dibujar_controles(lienzo)
+        with perfil.span("texto_hud"):
+            self.mostrar_hud(lienzo)
+        with perfil.span("cuerpos"):
+            self.dibujar_cuerpos(lienzo)
+        if self.mostrar_perfil:
+            self.mostrar_desglose(lienzo)
+
+        with perfil.span("lienzo.terminar"):
+            return lienzo.terminar()
+
+    def dibujar_controles(self, lienzo):
         # Dibujar controles
-        self.slider_k.draw(screen, self.font)
-        self.slider_x.draw(screen, self.font)
-        self.slider_masa.draw(screen, self.font)
-        self.slider_radio.draw(screen, self.font)
-        self.slider_gravedad.draw(screen, self.font)  # Dibujar slider de gravedad
-        self.start_button.draw(screen, self.font)
-        self.reset_button.draw(screen, self.font)
-        
-         # Mostrar energías
+        for slider in self.sliders:
+            lienzo.forma(("perilla", slider.label), slider.knob.topleft, slider.knob, slider.draw_knob)
+            label_text = render_texto(self.font, f"{slider.label}: {slider.value:.1f}", BLACK)
+            lienzo.texto(("etiqueta", slider.label), label_text, (slider.rect.x, slider.rect.y - 30))
+        for button in (self.start_button, self.reset_button):
+            lienzo.forma(("boton", button.text), (button.clicked, button.text), button.rect,
+                         lambda s, b=button: b.draw(s, self.font))
+
+    def mostrar_hud(self, lienzo):
+        # Mostrar energías
         energia_potencial_elastica = self.calcular_energia_potencial_elastica()  # Energía potencial elástica
-        energia_potencial_gravitacional = self.calcular_energia_potencial_gravitacional()  # Energía potencial gravitacional
-        energia_cinetica = self.calcular_energia_cinetica()  # Energía cinética
-        energia_mecanica = self.calcular_energia_mecanica() # Energía mecánica total
+        # En marcha se reutilizan las del último paso; antes, los sliders pueden cambiarlas
+        if self.simulacion_iniciada and self.energias_actuales is not None:
+            energia_cinetica, energia_potencial_gravitacional = self.energias_actuales
+        else:
+            self.estado.capturar()
+            energia_cinetica, energia_potencial_gravitacional = self.calcular_energias()
+        energia_mecanica = energia_cinetica + energia_potencial_elastica + energia_potencial_gravitacional # Energía mecánica total
         
-        energia_mecanica_texto = self.font.render(f"Energía Mecánica: {energia_mecanica/10:.1f} J", True, BLACK)
-        screen.blit(energia_mecanica_texto, (WIDTH-500, 630))
+        energia_mecanica_texto = render_texto(self.font, f"Energía Mecánica: {energia_mecanica/10:.1f} J", BLACK)
+        lienzo.texto("energia_mecanica", energia_mecanica_texto, (WIDTH-500, 630))
 
-        energia_potencial_elastica_texto = self.font.render(f"Energia Potencial (resorte): {energia_potencial_elastica/10:.1f} J", True, BLACK)
-        screen.blit(energia_potencial_elastica_texto, (WIDTH-500, 600))
+        energia_potencial_elastica_texto = render_texto(self.font, f"Energia Potencial (resorte): {energia_potencial_elastica/10:.1f} J", BLACK)
+        lienzo.texto("energia_elastica", energia_potencial_elastica_texto, (WIDTH-500, 600))
         
-        energia_gravitacional_texto = self.font.render(f"Energia Pot. Gravitacional: {energia_potencial_gravitacional/10:.1f} J", True, BLACK)
-        screen.blit(energia_gravitacional_texto, (WIDTH-500, 570))
+        energia_gravitacional_texto = render_texto(self.font, f"Energia Pot. Gravitacional: {energia_potencial_gravitacional/10:.1f} J", BLACK)
+        lienzo.texto("energia_gravitacional", energia_gravitacional_texto, (WIDTH-500, 570))
         
-        energia_cinetica_texto = self.font.render(f"Energia Cinética: {energia_cinetica/10:.1f} J", True, BLACK)
-        screen.blit(energia_cinetica_texto, (WIDTH-500, 540))
+        energia_cinetica_texto = render_texto(self.font, f"Energia Cinética: {energia_cinetica/10:.1f} J", BLACK)
+        lienzo.texto("energia_cinetica", energia_cinetica_texto, (WIDTH-500, 540))
+
+        # Gráfica de energías (solo se regenera cuando llegan datos nuevos)
+        lienzo.forma("grafica", self.grafica.version, self.grafica.rect, self.grafica.dibujar_en)
 
         # Mostrar las posiciones
-        self.mostrar_posiciones(screen)
+        self.mostrar_posiciones(lienzo)
         
         # Mostrar fuerzas
-        self.mostrar_fuerzas(screen)
+        self.mostrar_fuerzas(lienzo)
+
+        # Primer impacto de cada dominó
+        self.mostrar_registros(lienzo)
         
         # Dibujar energía actual
-        energia_text = self.font.render(f"Energía: {self.calcular_fuerza():.1f}", True, BLACK)
-        screen.blit(energia_text, (WIDTH//2 - 360, 50))
+        energia_text = render_texto(self.font, f"Energía: {self.calcular_fuerza():.1f}", BLACK)
+        lienzo.texto("energia", energia_text, (WIDTH//2 - 360, 50))
         
         # Dibujar peso actual
-        peso_text = self.font.render(f"Peso: {self.calcular_peso():.1f} N", True, BLACK)
-        screen.blit(peso_text, (WIDTH//2 - 360, 100))
+        peso_text = render_texto(self.font, f"Peso: {self.calcular_peso():.1f} N", BLACK)
+        lienzo.texto("peso_actual", peso_text, (WIDTH//2 - 360, 100))
         
         # Dibujar resorte
-        self.dibujar_resorte(screen)
-        
-        # Dibujar esfera
-        pos = self.cuerpo.position
-        pygame.draw.circle(screen, BLUE, (int(pos.x), int(pos.y)), int(self.slider_radio.value))
+        if not self.resorte_disparado:
+            lienzo.forma("resorte", tuple(self.resorte_pos), self.rect_resorte(), self.dibujar_resorte)
         
         # Mostrar estado
-        estado = "En Pausa" if self.simulacion_pausada else "En Ejecución" if self.simulacion_iniciada else "Esperando Inicio"
-        estado_text = self.font.render(f"Estado: {estado}", True, BLACK)
-        screen.blit(estado_text, (WIDTH//2 - 100, HEIGHT - 40))
-        space.debug_draw(draw_options)
+        if self.simulacion_terminada:
+            estado = "Terminada (en reposo)"
+        elif self.simulacion_pausada:
+            estado = "En Pausa"
+        else:
+            estado = "En Ejecución" if self.simulacion_iniciada else "Esperando Inicio"
+        estado_text = render_texto(self.font, f"Estado: {estado}", BLACK)
+        lienzo.texto("estado", estado_text, (WIDTH//2 - 100, HEIGHT - 40))
+
+        # Velocidad de la simulación
+        velocidad_text = render_texto(self.font, f"Velocidad: {self.reloj.escala:g}x", BLACK)
+        lienzo.texto("velocidad", velocidad_text, (WIDTH//2 + 200, HEIGHT - 40))
+
+    def dibujar_cuerpos(self, lienzo):
+        # Cuerpos dinámicos (dominós y demás), encima del HUD
+        for body in space.bodies:
+            if body is self.cuerpo:
+                continue
+            pose = self.pose_interpolada(body)
+            firma = (round(pose[0].x), round(pose[0].y), round(pose[1], 2))
+            for shape in body.shapes:
+                lienzo.forma(("forma", id(shape)), firma, rect_forma(shape, pose),
+                             lambda s, sh=shape, p=pose: dibujar_forma(s, sh, GRAY, BLACK, p))
+
+        # Dibujar esfera
+        pos = self.pose_interpolada(self.cuerpo)[0]
+        radio = int(self.slider_radio.value)
+        centro = (int(pos.x), int(pos.y))
+        lienzo.forma("esfera", (centro, radio), pygame.Rect(centro[0] - radio, centro[1] - radio, 2 * radio, 2 * radio).inflate(2, 2),
+                     lambda s: pygame.draw.circle(s, BLUE, centro, radio))
+
+    def mostrar_desglose(self, lienzo):
+        """Tiempo promedio por frame de cada etapa (F3 lo muestra u oculta)."""
+        if perfil.frame - self.desglose_frame >= 30 or not self.desglose:
+            # Se recalcula dos veces por segundo para no rasterizar texto nuevo en cada frame
+            self.desglose = perfil.desglose()
+            self.desglose_frame = perfil.frame
+        # Panel propio, encima del HUD, para que se lea aunque tape otros textos
+        panel = pygame.Rect(1010, 280, 260, 8 + 18 * max(1, len(self.desglose)))
+        lienzo.forma("perfil_panel", (panel.size, self.desglose_frame), panel,
+                     lambda s: (pygame.draw.rect(s, WHITE, panel), pygame.draw.rect(s, BLACK, panel, 1)))
+        if not self.desglose:
+            texto = render_texto(fuente(20), "Perfilando...", BLACK)
+            lienzo.texto(("perfil", 0), texto, (panel.x + 6, panel.y + 4))
+        for i, (nombre, nivel, ms) in enumerate(self.desglose):
+            texto = render_texto(fuente(20), f"{'  ' * nivel}{nombre}: {ms:.2f} ms", BLACK)
+            lienzo.texto(("perfil", i), texto, (panel.x + 6, panel.y + 4 + i * 18))
 
     def setup_inicial(self):
-        global fixed_origin
-        # Limpiar completamente el espacio
-        self.limpiar_espacio()
+        global fixed_origin, space
         # Restablecer el origen dinámico
         fixed_origin = None
-        # Crear elementos
-        self.crear_suelo()
-        self.crear_esfera()
-        self.crear_plataforma_circular()
+        if self.lienzo is not None:
+            self.lienzo.invalidar()
+
+        # Los sliders vuelven a sus valores iniciales, así que la escena inicial
+        # siempre es la misma: se construye una vez y después se restaura una copia
+        self.slider_k.reset_to_initial()
+        self.slider_x.reset_to_initial()
+        self.slider_masa.reset_to_initial()
+        self.slider_radio.reset_to_initial()
+        self.slider_gravedad.reset_to_initial()
+
+        if self.plantilla is None and self.escena is not None:
+            space, self.cuerpo, self.forma, dominoes = escenas.construir_espacio(
+                self.escena, self.slider_masa.value, self.slider_radio.value, self.slider_gravedad.value)
+            self.dominoes[:] = dominoes
+            self.plantilla = motor.Plantilla(space, self.cuerpo, self.forma, self.dominoes, escena=self.escena)
+        elif self.plantilla is None:
+            # Limpiar completamente el espacio
+            self.limpiar_espacio()
+            dominos.configurar_reposo(space)
+            # Crear elementos
+            self.crear_suelo()
+            self.crear_esfera()
+            self.crear_plataforma_circular()
+            self.crear_dominos()  # Crear los dominós
+            self.plantilla = motor.Plantilla(space, self.cuerpo, self.forma, self.dominoes)
+        else:
+            space, self.cuerpo, self.forma, dominoes = self.plantilla.clonar()
+            self.dominoes[:] = dominoes
         self.crear_resorte()
-        self.crear_dominos()  # Crear los dominós
+
+        # Colisiones por eventos sobre la escena nueva (la plantilla no lleva manejadores)
+        self.eventos.vaciar()
+        self.impactos = PrimerosImpactos(len(self.dominoes))
+        self.cascada = AnalisisCascada(self.dominoes, impactos=self.impactos)
+        instalar_manejadores(space, self.eventos, self.dominoes)
+        self.domino_records.clear()
+        self.estado = EstadoCuerpos(space, [self.cuerpo] + self.dominoes)
+        self.sistema = EnergiasSistema(self.estado)
+        self.energias_actuales = None
         
         # Resetear estados
         self.simulacion_iniciada = False
         self.simulacion_pausada = False
+        self.simulacion_terminada = False
         self.resorte_disparado = False
         self.start_button.clicked = False
-        
-        # Resetear sliders a sus valores iniciales
-        self.slider_k.reset_to_initial()
-        self.slider_x.reset_to_initial()
-        self.slider_masa.reset_to_initial()
-        self.slider_radio.reset_to_initial()
-        self.slider_gravedad.reset_to_initial()
+        self.esfera_pendiente = False
+        self.gravedad_pendiente = False
+
+        self.terminar_grabacion()
 
         # Llamar al método graficar antes de reiniciar
-        if self.tiempo_datos:
+        if len(self.energias):
             self.graficar_energias()    
 
         # Resetear datos de energía y tiempo
-        self.energia_cinetica_datos.clear()
-        self.energia_potencial_gravitacional_datos.clear()
-        self.energia_mecanica_datos.clear()
-        self.tiempo_datos.clear()
+        self.energias.limpiar()
+        self.grafica.limpiar()
         self.tiempo_actual = 0
+        self.estado_anterior = {}
+        self.reloj.reiniciar()
+
+
+def esperar_eventos(timeout_ms=TIEMPO_ESPERA_MS):
+    """Bloquea hasta que llegue un evento (o venza el timeout) y devuelve los pendientes."""
+    evento = pygame.event.wait(timeout_ms)
+    if evento.type == pygame.NOEVENT:
+        return []
+    return [evento] + pygame.event.get()
 
 
-def main():
+def main(escena=None, grabar=False):
     global fixed_origin  # Permite fijar el origen dinámico
 
+    abrir_ventana()
     clock = pygame.time.Clock()
-    sim = SimulacionGoldberg()
-    
+    sim = SimulacionGoldberg(escena, grabar)
+    if sim.escena is not None and sim.escena.meta["nombre"]:
+        abrir_ventana(f"Máquina de Goldberg - {sim.escena.meta['nombre']}")
+    tiempo_frame = 0.0
+    # Primer frame completo antes de empezar a esperar eventos
+    pygame.display.update(sim.dibujar(screen))
+
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
-                for slider in [sim.slider_k, sim.slider_x, sim.slider_masa, sim.slider_radio, sim.slider_gravedad]:
-                    if slider.knob.collidepoint(mouse_pos):
-                        slider.active = True
-                if sim.reset_button.rect.collidepoint(mouse_pos):
-                    sim.setup_inicial()
-                
-                if sim.start_button.rect.collidepoint(mouse_pos):
+        # Solo con la simulación en marcha se dibuja a 60 FPS; esperando inicio,
+        # en pausa o terminada, el bucle duerme hasta que haya entrada
+        activa = sim.simulacion_iniciada and not sim.simulacion_pausada and not sim.simulacion_terminada
+        if activa:
+            eventos = pygame.event.get()
+        else:
+            with perfil.span("espera"):
+                eventos = esperar_eventos()
+
+        with perfil.span("eventos"):
+            for event in eventos:
+                if event.type == pygame.QUIT:
+                    sim.terminar_grabacion()
+                    pygame.quit()
+                    sys.exit()
+
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    mouse_pos = pygame.mouse.get_pos()
+                    for slider in sim.sliders:
+                        if slider.knob.collidepoint(mouse_pos):
+                            slider.active = True
+                    if sim.reset_button.rect.collidepoint(mouse_pos):
+                        sim.setup_inicial()
+
+                    if sim.start_button.rect.collidepoint(mouse_pos):
+                        if not sim.simulacion_iniciada:
+                            sim.simulacion_iniciada = True
+                            sim.start_button.clicked = True
+                            sim.disparar_resorte()
+                            sim.iniciar_grabacion()
+                        elif not sim.simulacion_terminada:
+                            sim.simulacion_pausada = not sim.simulacion_pausada
+
+                    if sim.reset_button.rect.collidepoint(mouse_pos):
+                        sim.setup_inicial()
+
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    # La ventana se volvió a mostrar: hay que repintarla entera
+                    sim.lienzo.invalidar()
+
+                elif event.type == pygame.MOUSEBUTTONUP:
+                    for slider in sim.sliders:
+                        slider.active = False
+
+                elif event.type == pygame.MOUSEMOTION:
+                    for slider in sim.sliders:
+                        if slider.active and not sim.simulacion_iniciada:
+                            slider.update(pygame.mouse.get_pos())
+                            if slider in [sim.slider_masa, sim.slider_radio]:
+                                sim.esfera_pendiente = True
+                            elif slider == sim.slider_gravedad:  # Añadir esta condición
+                                sim.gravedad_pendiente = True
+                elif event.type == pygame.KEYDOWN:
+                    # Escala de tiempo: + acelera, - desacelera, 0 vuelve a tiempo real
+                    if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        sim.reloj.acelerar()
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        sim.reloj.desacelerar()
+                    elif event.key in (pygame.K_0, pygame.K_KP0):
+                        sim.reloj.escala = 1.0
+                    # F3 muestra el desglose de tiempos por frame; F4 exporta la traza para chrome://tracing
+                    elif event.key == pygame.K_F3:
+                        perfil.limpiar()
+                        sim.desglose = []
+                        sim.mostrar_perfil = perfil.alternar()
+                    elif event.key == pygame.K_F4:
+                        ruta = os.path.join(CARPETA_CORRIDAS, time.strftime("traza_%Y%m%d_%H%M%S.json"))
+                        print(f"Traza guardada en {perfil.exportar_chrome(ruta)}")
+                    # F5 activa o desactiva la grabación de trayectorias (también la corrida en curso)
+                    elif event.key == pygame.K_F5:
+                        sim.grabar = not sim.grabar
+                        if not sim.grabar:
+                            sim.terminar_grabacion()
+                        elif sim.simulacion_iniciada and not sim.simulacion_terminada:
+                            sim.iniciar_grabacion()
+                        print(f"Grabación de trayectorias {'activada' if sim.grabar else 'desactivada'}")
+                    # Permitir mover el marco solo antes de iniciar la simulación
                     if not sim.simulacion_iniciada:
-                        sim.simulacion_iniciada = True
-                        sim.start_button.clicked = True
-                        sim.disparar_resorte()
-                    else:
-                        sim.simulacion_pausada = not sim.simulacion_pausada
-                
-                if sim.reset_button.rect.collidepoint(mouse_pos):
-                    sim.setup_inicial()
-            
-            elif event.type == pygame.MOUSEBUTTONUP:
-                for slider in [sim.slider_k, sim.slider_x, sim.slider_masa, sim.slider_radio, sim.slider_gravedad]:
-                    slider.active = False
-            
-            elif event.type == pygame.MOUSEMOTION:
-                for slider in [sim.slider_k, sim.slider_x, sim.slider_masa, sim.slider_radio, sim.slider_gravedad]:
-                    if slider.active and not sim.simulacion_iniciada:
-                        slider.update(pygame.mouse.get_pos())
-                        if slider in [sim.slider_masa, sim.slider_radio]:
-                            sim.crear_esfera()
-                        elif slider == sim.slider_gravedad:  # Añadir esta condición
-                            space.gravity = (0, sim.slider_gravedad.value)
-            elif event.type == pygame.KEYDOWN:
-                # Permitir mover el marco solo antes de iniciar la simulación
-                if not sim.simulacion_iniciada:
-                    if event.key == pygame.K_UP:
-                        custom_origin[1] -= 10  # Marco sube
-                    elif event.key == pygame.K_DOWN:
-                        custom_origin[1] += 10  # Marco baja
-                    elif event.key == pygame.K_LEFT:
-                        custom_origin[0] += 10  # Marco a la izquierda
-                    elif event.key == pygame.K_RIGHT:
-                        custom_origin[0] -= 10  # Marco a la derecha
-                    elif event.key == pygame.K_RETURN:  # Fijar el origen
-                        fix_origin()
-
-
-                    
-        if sim.simulacion_iniciada and not sim.simulacion_pausada:
-            space.step(1/60.0)
-            sim.actualizar_energias(1 / 60.0)  # Registrar energías en cada frame
-       # sim.detectar_colisiones()
-        sim.dibujar(screen)
-        pygame.display.flip()
-        clock.tick(60)
+                        if event.key == pygame.K_UP:
+                            custom_origin[1] -= 10  # Marco sube
+                        elif event.key == pygame.K_DOWN:
+                            custom_origin[1] += 10  # Marco baja
+                        elif event.key == pygame.K_LEFT:
+                            custom_origin[0] += 10  # Marco a la izquierda
+                        elif event.key == pygame.K_RIGHT:
+                            custom_origin[0] -= 10  # Marco a la derecha
+                        elif event.key == pygame.K_RETURN:  # Fijar el origen
+                            fix_origin()
+                        # El marco de referencia forma parte del fondo precalculado
+                        sim.lienzo.invalidar()
+
+        # Cambios de sliders acumulados durante los eventos del frame
+        with perfil.span("aplicar_sliders"):
+            sim.aplicar_sliders()
+
+        if sim.simulacion_iniciada and not sim.simulacion_pausada and not sim.simulacion_terminada:
+            # Pasos fijos de física según el tiempo real del frame anterior
+            with perfil.span("fisica"):
+                sim.avanzar(tiempo_frame)
+        # Sin simulación en marcha solo se repinta si hubo entrada (o un cambio de estado por ella)
+        if activa or eventos:
+            with perfil.span("dibujar"):
+                rects = sim.dibujar(screen)
+            with perfil.span("display.update"):
+                pygame.display.update(rects)
+        perfil.marcar_frame()
+        transcurrido = clock.tick(60) / 1000.0
+        # El tiempo bloqueado en la espera no se convierte en tiempo simulado
+        tiempo_frame = transcurrido if activa else 0.0
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Máquina de Goldberg interactiva.")
+    parser.add_argument("escena", nargs="?", help="Ruta o nombre de una escena de escenas/ (por ejemplo, dominos)")
+    parser.add_argument("--grabar", action="store_true", help="Grabar la trayectoria de cada corrida en corridas/")
+    args = parser.parse_args()
+    main(args.escena, args.grabar)
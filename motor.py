@@ -0,0 +1,502 @@
+import argparse
+import copy
+import math
+
+import numpy as np
+import pymunk
+
+import comandos
+import dominos
+import escena as escenas
+from cascada import AnalisisCascada, resumen_cascada, tiempos_de_caida
+from colisiones import TIPO_ESFERA, TIPO_PLATAFORMA, ColaEventos, PrimerosImpactos, instalar_manejadores
+from grabador import GrabadorTrayectoria
+from registro import DTYPE_ENERGIAS, RegistroEnergias
+from trayectoria import ANGULO, EnergiasSistema, EstadoCuerpos, RegistroEstados, energias_por_cuerpo
+
+# Motor de simulación sin ventana (headless).
+# Construye la misma escena que main.py pero sin pygame: no abre ventana,
+# no carga fuentes y avanza el espacio de pymunk tan rápido como da la CPU.
+
+# Geometría de la escena (coordenadas de pymunk, eje Y hacia abajo)
+PUNTOS_PLATAFORMA_INICIAL = [
+    (50, 200),
+    (200, 200)
+]
+PUNTOS_PLATAFORMA_MEDIA = [
+    (200, 202),
+    (400, 350),
+    (500, 350)
+]
+PUNTOS_PLATAFORMA2 = [
+    (700, 300),
+    (400, 550),
+    (100, 550)
+]
+
+CENTRO_PLATAFORMA_CIRCULAR = (645, 215)
+RADIO_PLATAFORMA_CIRCULAR = 100
+ANGULO_INICIAL_CIRCULAR = 1
+ANGULO_FINAL_CIRCULAR = -2.5
+SEGMENTOS_CIRCULAR = 20
+
+# Dominós
+DOMINO_ANCHO = dominos.DOMINO_ANCHO
+DOMINO_ALTO = dominos.DOMINO_ALTO
+DOMINO_ESPACIO = 10
+DOMINO_X = 150
+DOMINO_Y = 515
+NUM_DOMINOS = 5
+# Los que caben de pie en el tramo plano de la plataforma 2 (hasta x = 400);
+# los siguientes quedarían en la rampa o en el vacío
+MAX_DOMINOS = int((PUNTOS_PLATAFORMA2[1][0] - DOMINO_ANCHO / 2 - DOMINO_X) // (DOMINO_ANCHO + DOMINO_ESPACIO)) + 1
+DOMINOS_ESCENA_GRANDE = dominos.DOMINOS_ESCENA_GRANDE
+
+# Origen del marco de referencia (esquina inferior izquierda de la ventana)
+ORIGEN_POR_DEFECTO = (0, 720)
+
+# Apoyo de la esfera sobre la plataforma inicial y tope del impulso del resorte
+APOYO_ESFERA = (50, 202)
+IMPULSO_MAXIMO = 1200
+
+# Valores iniciales de los sliders de main.py
+PARAMETROS_POR_DEFECTO = {
+    "k": 7.5,
+    "x": 7.5,
+    "masa": 1,
+    "radio": 20,
+    "gravedad": 980,
+}
+
+DT = 1 / 60.0
+
+
+## Construcción de la escena:
+
+def crear_suelo(space, puntos_inicial=PUNTOS_PLATAFORMA_INICIAL,
+                puntos_media=PUNTOS_PLATAFORMA_MEDIA, puntos2=PUNTOS_PLATAFORMA2):
+    """Agrega las plataformas rectas al espacio y devuelve sus segmentos."""
+    segmentos = []
+    # Solo la plataforma final está bajo los dominós; las demás no se cruzan con ellos
+    for puntos, friccion, filtro in ((puntos_inicial, 10.0, dominos.FILTRO_RAMPA),
+                                     (puntos_media, 10.0, dominos.FILTRO_RAMPA),
+                                     (puntos2, 1.0, dominos.FILTRO_SUELO)):
+        for i in range(len(puntos) - 1):
+            segmento = pymunk.Segment(space.static_body, puntos[i], puntos[i + 1], 4)
+            segmento.friction = friccion
+            segmento.elasticity = 0.5
+            segmento.filter = filtro
+            segmento.collision_type = TIPO_PLATAFORMA
+            segmentos.append(segmento)
+    space.add(*segmentos)
+    return segmentos
+
+
+def puntos_plataforma_circular(center=CENTRO_PLATAFORMA_CIRCULAR, radius=RADIO_PLATAFORMA_CIRCULAR,
+                               start_angle=ANGULO_INICIAL_CIRCULAR, end_angle=ANGULO_FINAL_CIRCULAR,
+                               num_segments=SEGMENTOS_CIRCULAR):
+    """Teselado del arco de la plataforma circular."""
+    points = []
+    for i in range(num_segments + 1):
+        angle = start_angle + (end_angle - start_angle) * (i / num_segments)
+        x = center[0] + radius * math.cos(angle)
+        y = center[1] + radius * math.sin(angle)
+        points.append((x, y))
+    return points
+
+
+def crear_plataforma_circular(space, points=None):
+    """Agrega la plataforma circular al espacio y devuelve sus segmentos."""
+    if points is None:
+        points = puntos_plataforma_circular()
+    segmentos = []
+    for i in range(len(points) - 1):
+        segment = pymunk.Segment(space.static_body, points[i], points[i + 1], 4)
+        segment.friction = 1.0
+        segment.elasticity = 0.5
+        segment.filter = dominos.FILTRO_RAMPA
+        segment.collision_type = TIPO_PLATAFORMA
+        segmentos.append(segment)
+    space.add(*segmentos)
+    return segmentos
+
+
+def crear_esfera(space, masa, radio):
+    """Crea la esfera sobre la plataforma inicial y devuelve (cuerpo, forma)."""
+    momento = pymunk.moment_for_circle(masa, 0, radio)
+    cuerpo = pymunk.Body(masa, momento)
+    cuerpo.position = (APOYO_ESFERA[0], APOYO_ESFERA[1] - radio)
+
+    forma = pymunk.Circle(cuerpo, radio)
+    forma.friction = 1.0
+    forma.elasticity = 0.5
+    forma.filter = dominos.FILTRO_ESFERA
+    forma.collision_type = TIPO_ESFERA
+
+    space.add(cuerpo, forma)
+    return cuerpo, forma
+
+
+def crear_dominos(space, num_dominos=NUM_DOMINOS, x_pos=DOMINO_X, y_pos=DOMINO_Y):
+    """Crea la fila de dominós sobre la plataforma final y devuelve sus cuerpos."""
+    posiciones = np.empty((num_dominos, 2))
+    posiciones[:, 0] = x_pos + np.arange(num_dominos) * (DOMINO_ANCHO + DOMINO_ESPACIO)
+    posiciones[:, 1] = y_pos
+    return dominos.crear_cadena_dominos(space, posiciones)
+
+
+def ajustar_esfera(cuerpo, forma, masa, radio, apoyo=APOYO_ESFERA):
+    """Cambia masa y radio de la esfera en el lugar, sin recrear cuerpo ni forma."""
+    cuerpo.mass = masa
+    cuerpo.moment = pymunk.moment_for_circle(masa, 0, radio)
+    forma.unsafe_set_radius(radio)
+    cuerpo.position = (apoyo[0], apoyo[1] - radio)
+
+
+def construir_escena(masa=1, radio=20, gravedad=980, num_dominos=NUM_DOMINOS):
+    """Construye la escena completa y devuelve (space, cuerpo, forma, dominoes)."""
+    if not 0 <= num_dominos <= MAX_DOMINOS:
+        raise ValueError(f"La escena admite entre 0 y {MAX_DOMINOS} dominós; para más, usar una escena")
+    space = pymunk.Space()
+    space.gravity = (0, gravedad)
+    dominos.configurar_reposo(space)
+
+    crear_suelo(space)
+    cuerpo, forma = crear_esfera(space, masa, radio)
+    crear_plataforma_circular(space)
+    dominoes = crear_dominos(space, num_dominos)
+    return space, cuerpo, forma, dominoes
+
+
+class Plantilla:
+    """Escena inicial ya construida; cada reinicio o corrida parte de una copia."""
+
+    def __init__(self, space, cuerpo, forma, dominoes, escena=None):
+        # Se copian juntos para que las referencias apunten dentro de la copia
+        self._escena = copy.deepcopy((space, cuerpo, forma, list(dominoes)))
+        self.escena = escena  # EscenaCompilada de origen, o None para la escena de este módulo
+
+    @classmethod
+    def desde_escena(cls, escena):
+        """Plantilla a partir de una escena declarativa (ruta, nombre o descripción)."""
+        compilada = escenas.cargar(escena)
+        return cls(*escenas.construir_espacio(compilada), escena=compilada)
+
+    def clonar(self):
+        """Devuelve una copia nueva de (space, cuerpo, forma, dominoes)."""
+        space, cuerpo, forma, dominoes = copy.deepcopy(self._escena)
+        dominos.configurar_reposo(space)
+        if len(dominoes) >= DOMINOS_ESCENA_GRANDE:
+            # El índice espacial no viaja con la copia
+            dominos.configurar_espacio(space, len(dominoes))
+        return space, cuerpo, forma, dominoes
+
+
+# Escena inicial de cada proceso, construida una sola vez por escena y número de dominós
+_plantillas = {}
+
+
+def plantilla_para(escena=None, num_dominos=NUM_DOMINOS):
+    """Plantilla compartida por todas las corridas de un proceso trabajador."""
+    clave = (escena, None if escena else num_dominos)
+    if clave not in _plantillas:
+        if escena:
+            _plantillas[clave] = Plantilla.desde_escena(escena)
+        else:
+            _plantillas[clave] = Plantilla(*construir_escena(num_dominos=num_dominos))
+    return _plantillas[clave]
+
+
+def impulso_resorte(k, x, impulso_maximo=IMPULSO_MAXIMO):
+    """Impulso que el resorte da a la esfera: ½·k·x², con tope. Acepta arreglos de NumPy."""
+    return np.minimum(0.5 * np.asarray(k) * np.asarray(x) ** 2, impulso_maximo)
+
+
+## Motor:
+
+class MotorGoldberg:
+    """Simulación de la máquina de Goldberg sin interfaz gráfica."""
+
+    def __init__(self, k=None, x=None, masa=None, radio=None, gravedad=None,
+                 num_dominos=NUM_DOMINOS, origen=ORIGEN_POR_DEFECTO, capacidad_maxima=None,
+                 registrar_estados=False, plantilla=None, grabar_en=None, escena=None, series=True):
+        # Con `escena` (ruta, nombre, descripción o EscenaCompilada) la geometría
+        # sale del archivo y num_dominos se ignora; los parámetros que falten
+        # toman el valor inicial de los sliders de la escena
+        if plantilla is not None and plantilla.escena is not None:
+            escena = plantilla.escena
+        if escena is not None:
+            escena = escenas.cargar(escena)
+            por_defecto = escena.parametros()
+            self.apoyo = escena.apoyo_esfera
+            self.impulso_maximo = escena.impulso_maximo
+        else:
+            por_defecto = PARAMETROS_POR_DEFECTO
+            self.apoyo = APOYO_ESFERA
+            self.impulso_maximo = IMPULSO_MAXIMO
+        self.escena = escena
+        self.k = por_defecto["k"] if k is None else k
+        self.x = por_defecto["x"] if x is None else x
+        self.masa = por_defecto["masa"] if masa is None else masa
+        self.radio = por_defecto["radio"] if radio is None else radio
+        self.gravedad = por_defecto["gravedad"] if gravedad is None else gravedad
+        self.origen = origen
+
+        if plantilla is not None:
+            # Copia de una escena ya construida; solo cambian esfera y gravedad
+            self.space, self.cuerpo, self.forma, self.dominoes = plantilla.clonar()
+            ajustar_esfera(self.cuerpo, self.forma, self.masa, self.radio, self.apoyo)
+            self.space.gravity = (0, self.gravedad)
+        elif escena is not None:
+            self.space, self.cuerpo, self.forma, self.dominoes = escenas.construir_espacio(
+                escena, self.masa, self.radio, self.gravedad)
+        else:
+            self.space, self.cuerpo, self.forma, self.dominoes = construir_escena(
+                self.masa, self.radio, self.gravedad, num_dominos)
+
+        # Los manejadores de colisión se instalan en la copia, no en la plantilla
+        self.eventos = ColaEventos()
+        self.impactos = PrimerosImpactos(len(self.dominoes))
+        instalar_manejadores(self.space, self.eventos, self.dominoes)
+        # Con trayectoria registrada la cascada se analiza al final (ver resumen_cascada)
+        self.cascada = AnalisisCascada(self.dominoes, impactos=self.impactos)
+
+        self.resorte_disparado = False
+        self.tiempo_actual = 0
+        self.motivo_parada = None  # Por qué terminó ejecutar() antes de tiempo, si lo hizo
+        self.energias = RegistroEnergias(capacidad_maxima=capacidad_maxima)
+        # Con series=False no se registran las energías paso a paso, solo una
+        # fila al terminar ejecutar(): para barridos que solo usan el resultado
+        self.series = series
+        # Estado de la esfera y los dominós, leído una vez por paso y compartido
+        # por las energías, la cascada y los registros de trayectoria
+        self.estado = EstadoCuerpos(self.space, [self.cuerpo] + self.dominoes)
+        # Energías de la esfera y de todos los dominós; la esfera mide su altura
+        # desde el origen, como en la interfaz, y cada dominó desde su pose inicial
+        self.sistema = EnergiasSistema(self.estado)
+        self.sistema.y_referencia[0] = self.origen[1] - self.radio - 8
+        # Con registrar_estados solo se guarda el estado crudo de los cuerpos en
+        # cada paso y las energías se calculan al final (ver energias_trayectoria)
+        self.trayectoria = RegistroEstados([self.cuerpo] + self.dominoes) if registrar_estados else None
+        # Con grabar_en el estado de todos los cuerpos se escribe a disco en cada paso
+        self.grabador = None
+        if grabar_en:
+            self.grabador = GrabadorTrayectoria(grabar_en, [self.cuerpo] + self.dominoes,
+                                                metadatos=self.parametros())
+
+    # Energías (mismas fórmulas y escalas que SimulacionGoldberg)
+
+    def calcular_energia_potencial_elastica(self):
+        return 0.5 * self.k * (self.x ** 2)
+
+    def calcular_energias(self):
+        """Energías cinética (traslación + rotación) y gravitacional de todo el sistema.
+
+        Usa el último estado capturado en `self.estado`. El desglose por
+        cuerpo queda en `self.sistema.por_cuerpo` (la esfera es la posición 0).
+        """
+        traslacion, rotacion, gravitacional = self.sistema.calcular(self.gravedad)
+        return traslacion + rotacion, gravitacional
+
+    def calcular_fuerza(self):
+        return float(impulso_resorte(self.k, self.x, self.impulso_maximo))
+
+    def disparar_resorte(self):
+        if not self.resorte_disparado:
+            self.cuerpo.apply_impulse_at_local_point((self.calcular_fuerza(), 0))
+            self.resorte_disparado = True
+
+    def actualizar_energias(self, delta_t):
+        self.tiempo_actual += delta_t
+        self.estado.capturar()
+        self._registrar_energias()
+
+    def _registrar_energias(self):
+        """Agrega una fila de energías con el estado ya capturado."""
+        energia_cinetica, energia_potencial_gravitacional = self.calcular_energias()
+        energia_potencial_elastica = self.calcular_energia_potencial_elastica()
+
+        self.energias.agregar(
+            self.tiempo_actual,
+            energia_cinetica,
+            energia_potencial_elastica,
+            energia_potencial_gravitacional,
+            energia_cinetica + energia_potencial_elastica + energia_potencial_gravitacional,
+        )
+
+    def paso(self, dt=DT):
+        """Avanza la física un paso y registra las energías.
+
+        El estado de los cuerpos se lee una sola vez y lo comparten todos los
+        registros, también la cascada.
+        """
+        self.eventos.tiempo = self.tiempo_actual + dt
+        self.space.step(dt)
+        self.impactos.procesar(self.eventos.vaciar())
+        self.tiempo_actual += dt
+        estado = self.estado.capturar()
+        if self.trayectoria is not None:
+            self.trayectoria.registrar(self.tiempo_actual, estado)
+        else:
+            if self.series:
+                self._registrar_energias()
+            self.cascada.registrar(self.tiempo_actual, estado[1:, ANGULO])
+        if self.grabador is not None:
+            self.grabador.registrar(self.tiempo_actual, estado)
+
+    @property
+    def alcanzo_dominos(self):
+        return self.impactos.esfera_toco_dominos
+
+    def en_reposo(self):
+        """True cuando, ya disparado el resorte, todos los cuerpos están dormidos."""
+        return self.resorte_disparado and dominos.en_reposo(self.space)
+
+    def ejecutar(self, duracion=10.0, dt=DT, detener=None, cada=10, parar_en_reposo=True):
+        """Dispara el resorte y simula `duracion` segundos sin esperar al reloj.
+
+        Si se da `detener(motor)`, se consulta cada `cada` pasos; cuando
+        devuelve un motivo (por ejemplo, "ultimo_caido") la corrida termina
+        ahí y el motivo queda en `motivo_parada`. Con `parar_en_reposo` la
+        corrida también termina ("reposo") cuando todo quedó dormido: desde
+        ahí las energías ya no cambian.
+        """
+        self.disparar_resorte()
+        pasos = int(round(duracion / dt))
+        if self.trayectoria is not None:
+            self.trayectoria.reservar(len(self.trayectoria) + pasos)
+        elif self.series:
+            self.energias.reservar(len(self.energias) + pasos)
+        try:
+            for i in range(1, pasos + 1):
+                self.paso(dt)
+                if i % cada == 0:
+                    if detener is not None:
+                        self.motivo_parada = detener(self)
+                    if not self.motivo_parada and parar_en_reposo and self.en_reposo():
+                        self.motivo_parada = "reposo"
+                    if self.motivo_parada:
+                        break
+        finally:
+            if self.grabador is not None:
+                self.grabador.cerrar()
+        if self.trayectoria is not None:
+            self.energias_trayectoria()
+        elif not self.series:
+            # Sin series, una sola fila con el estado final
+            self.estado.capturar()
+            self._registrar_energias()
+        return self.resultados()
+
+    def energias_trayectoria(self):
+        """Calcula las energías de toda la trayectoria registrada en una pasada.
+
+        Devuelve el desglose por cuerpo (arreglos pasos x cuerpos; la columna 0
+        es la esfera) y carga en `self.energias` los totales del sistema, con
+        las mismas referencias que calcular_energias.
+        """
+        tr = self.trayectoria
+        alturas = self.origen[1] - self.sistema.y_referencia
+        por_cuerpo = energias_por_cuerpo(tr.estados, tr.masas, tr.momentos,
+                                         self.gravedad, self.origen[1], alturas)
+
+        filas = np.empty(len(tr), dtype=DTYPE_ENERGIAS)
+        filas["tiempo"] = tr.tiempos
+        filas["energia_cinetica"] = (por_cuerpo["energia_cinetica"].sum(1)
+                                     + por_cuerpo["energia_cinetica_rotacional"].sum(1))
+        filas["energia_potencial_elastica"] = self.calcular_energia_potencial_elastica()
+        filas["energia_potencial_gravitacional"] = por_cuerpo["energia_potencial_gravitacional"].sum(1)
+        filas["energia_mecanica"] = (filas["energia_cinetica"] + filas["energia_potencial_elastica"]
+                                     + filas["energia_potencial_gravitacional"])
+        self.energias.limpiar()
+        self.energias.extender(filas)
+        return por_cuerpo
+
+    def datos_dominos(self):
+        # Caído respecto de la pose inicial, con el mismo umbral que la cascada:
+        # en arcos y polilíneas los dominós ya empiezan inclinados
+        iniciales, umbral = self.cascada.angulos_iniciales, self.cascada.umbral
+        datos = []
+        for i, domino in enumerate(self.dominoes):
+            datos.append({
+                "posicion": tuple(domino.position),
+                "velocidad": tuple(domino.velocity),
+                "angulo": domino.angle,
+                "caido": bool(abs(domino.angle - iniciales[i]) >= umbral),
+                "primer_impacto": self.impactos.registro(i) if not math.isnan(self.impactos.tiempo[i]) else None,
+            })
+        return datos
+
+    def resumen_cascada(self):
+        """Tiempos de caída, velocidad del frente y punto donde se detuvo la cascada."""
+        tr = self.trayectoria
+        if tr is None:
+            return self.cascada.resumen()
+        angulos = tr.estados[:, 1:, ANGULO]  # La columna 0 es la esfera
+        tiempos = tiempos_de_caida(tr.tiempos, angulos, self.cascada.angulos_iniciales, self.cascada.umbral)
+        return resumen_cascada(tiempos, self.cascada.distancias, self.impactos.tiempo)
+
+    def parametros(self):
+        return {
+            "k": self.k,
+            "x": self.x,
+            "masa": self.masa,
+            "radio": self.radio,
+            "gravedad": self.gravedad,
+        }
+
+    def resultados(self):
+        """Resumen de la corrida; las series de energía son arreglos de NumPy."""
+        dominos = self.datos_dominos()
+        ultimo = self.energias.ultimo()
+        return {
+            "parametros": self.parametros(),
+            "tiempo_simulado": self.tiempo_actual,
+            "motivo_parada": self.motivo_parada,
+            **self.energias.como_dict(),
+            "energia_mecanica_final": float(ultimo["energia_mecanica"]) if ultimo is not None else None,
+            "alcanzo_dominos": self.alcanzo_dominos,
+            "dominos_caidos": sum(d["caido"] for d in dominos),
+            "cascada": self.resumen_cascada(),
+            "dominos": dominos,
+        }
+
+
+def simular(k=None, x=None, masa=None, radio=None, gravedad=None, duracion=10.0, dt=DT, num_dominos=NUM_DOMINOS,
+            registrar_estados=False, grabar_en=None, escena=None, parar_en_reposo=True, series=True):
+    """Ejecuta una simulación completa sin ventana y devuelve sus resultados."""
+    motor = MotorGoldberg(k=k, x=x, masa=masa, radio=radio, gravedad=gravedad, num_dominos=num_dominos,
+                          registrar_estados=registrar_estados, grabar_en=grabar_en, escena=escena,
+                          series=series)
+    return motor.ejecutar(duracion, dt, parar_en_reposo=parar_en_reposo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulación de la máquina de Goldberg sin ventana.")
+    comandos.agregar_escena(parser)
+    parser.add_argument("--k", type=float, help="Constante del resorte (N/m)")
+    parser.add_argument("--x", type=float, help="Compresión del resorte (m)")
+    parser.add_argument("--masa", type=float)
+    parser.add_argument("--radio", type=float)
+    parser.add_argument("--gravedad", type=float)
+    comandos.agregar_dominos(parser, NUM_DOMINOS, MAX_DOMINOS)
+    parser.add_argument("--duracion", type=float, default=10.0, help="Tiempo simulado (s)")
+    parser.add_argument("--dt", type=float, default=DT, help="Paso de integración (s)")
+    parser.add_argument("--sin-parada", action="store_true",
+                        help="Simular toda la duración aunque todos los cuerpos queden en reposo")
+    parser.add_argument("--trayectoria", action="store_true",
+                        help="Registrar solo el estado de los cuerpos y calcular las energías al final")
+    parser.add_argument("--grabar", help="Archivo binario donde grabar la trayectoria de todos los cuerpos")
+    comandos.agregar_salida(parser)
+    args = parser.parse_args(argv)
+
+    resultados = simular(k=args.k, x=args.x, masa=args.masa, radio=args.radio, gravedad=args.gravedad,
+                         duracion=args.duracion, dt=args.dt, num_dominos=args.dominos,
+                         registrar_estados=args.trayectoria, grabar_en=args.grabar, escena=args.escena,
+                         parar_en_reposo=not args.sin_parada)
+
+    comandos.escribir_json(resultados, args.salida)
+
+
+if __name__ == "__main__":
+    main()
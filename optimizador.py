@@ -0,0 +1,187 @@
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import comandos
+import escena as escenas
+import motor
+from cascada import origen_y_sentido
+
+# Diseño inverso: la menor energía del resorte que derriba el último dominó.
+# El resorte solo entra a la simulación por el impulso calcular_fuerza() =
+# min(½·k·x², impulso máximo), así que para una masa dada el resultado depende
+# de una sola variable, la energía E. Se busca E por bisección (en paralelo,
+# varios puntos por ronda) para cada masa de una malla, suponiendo que si E
+# alcanza también alcanza cualquier energía mayor. Cada evaluación es una
+# corrida sin ventana que termina en cuanto el resultado está decidido.
+
+VELOCIDAD_REPOSO = 5.0      # px/s: por debajo, el cuerpo se considera quieto
+OMEGA_REPOSO = 0.05         # rad/s
+TIEMPO_DETENIDA = 0.5       # s quieta antes de dar la esfera por detenida
+MARGEN_CAIDA = 100          # px por debajo de la plataforma más baja
+
+
+def cayo_el_ultimo(sim):
+    """True si cayó el dominó del extremo opuesto al que golpeó la esfera.
+
+    En la escena de Goldberg la esfera llega por la derecha, así que el último
+    de la cascada es dominoes[0], no dominoes[-1].
+    """
+    tiempos = sim.cascada.tiempos_caida
+    origen, sentido = origen_y_sentido(tiempos, sim.impactos.tiempo)
+    if origen is None:
+        return False
+    extremo = len(tiempos) - 1 if sentido > 0 else 0
+    return not math.isnan(tiempos[extremo])
+
+
+def criterio_parada(sim):
+    """Función para MotorGoldberg.ejecutar(detener=...) que decide cuándo cortar la corrida.
+
+    La corrida está decidida cuando:
+    - cayó el último dominó de la cascada ("ultimo_caido", ver cayo_el_ultimo), o
+    - la esfera se salió de las plataformas o lleva TIEMPO_DETENIDA quieta, y
+      los dominós ya no se mueven ("esfera_fuera", "esfera_detenida").
+    """
+    limite_y = max(shape.bb.top for shape in sim.space.static_body.shapes) + MARGEN_CAIDA
+    estado = {"quieta_desde": None}
+
+    def dominos_quietos():
+        return all(b.velocity.length < VELOCIDAD_REPOSO and abs(b.angular_velocity) < OMEGA_REPOSO
+                   for b in sim.dominoes)
+
+    def detener(sim):
+        if sim.dominoes and cayo_el_ultimo(sim):
+            return "ultimo_caido"
+        esfera = sim.cuerpo
+        if esfera.position.y > limite_y:
+            return "esfera_fuera" if dominos_quietos() else None
+        if esfera.velocity.length < VELOCIDAD_REPOSO:
+            if estado["quieta_desde"] is None:
+                estado["quieta_desde"] = sim.tiempo_actual
+            elif sim.tiempo_actual - estado["quieta_desde"] >= TIEMPO_DETENIDA and dominos_quietos():
+                return "esfera_detenida"
+        else:
+            estado["quieta_desde"] = None
+        return None
+
+    return detener
+
+
+def k_x_para_energia(energia, k_max, x_max):
+    """k y x que dan ½·k·x² = energia, escalando ambos por igual desde (k_max, x_max)."""
+    escala = (energia / (0.5 * k_max * x_max ** 2)) ** (1 / 3)
+    return escala * k_max, escala * x_max
+
+
+def evaluar(argumentos):
+    """Una corrida con parada temprana; devuelve si cayó el último dominó y cuánto costó."""
+    k, x, masa, duracion, dt, num_dominos, escena = argumentos
+    sim = motor.MotorGoldberg(k=k, x=x, masa=masa, num_dominos=num_dominos,
+                              plantilla=motor.plantilla_para(escena, num_dominos), series=False)
+    resultados = sim.ejecutar(duracion, dt, detener=criterio_parada(sim))
+    return {
+        "k": k,
+        "x": x,
+        "masa": masa,
+        "energia": sim.calcular_fuerza(),
+        "exito": bool(sim.dominoes) and cayo_el_ultimo(sim),
+        "dominos_caidos": resultados["cascada"]["caidos"],
+        "motivo_parada": resultados["motivo_parada"],
+        "tiempo_simulado": resultados["tiempo_simulado"],
+    }
+
+
+def optimizar(masas, tolerancia=1.0, puntos=None, duracion=15.0, dt=motor.DT, num_dominos=motor.NUM_DOMINOS,
+              escena=None, procesos=None):
+    """Energía mínima que derriba el último dominó para cada masa, y la mejor combinación.
+
+    En cada ronda se evalúan `puntos` energías dentro del intervalo de cada
+    masa, todas en paralelo, y el intervalo se achica al tramo entre el último
+    fracaso y el primer éxito, hasta que mide menos de `tolerancia`.
+    """
+    if escena:
+        compilada = escenas.cargar(escena)
+        rangos, impulso_maximo = compilada.meta["sliders"], compilada.impulso_maximo
+    else:
+        rangos, impulso_maximo = escenas.SLIDERS_POR_DEFECTO, motor.IMPULSO_MAXIMO
+    k_max, x_max = rangos["k"]["max"], rangos["x"]["max"]
+    energia_maxima = min(impulso_maximo, 0.5 * k_max * x_max ** 2)
+    procesos = comandos.num_procesos(procesos)
+    puntos = puntos or max(1, procesos // len(masas))
+
+    def tarea(masa, energia):
+        k, x = k_x_para_energia(energia, k_max, x_max)
+        return (k, x, masa, duracion, dt, num_dominos, escena)
+
+    evaluaciones = []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        # Primero el extremo superior: si ni con la energía máxima cae, esa masa no tiene solución
+        maximos = list(pool.map(evaluar, [tarea(m, energia_maxima) for m in masas]))
+        evaluaciones.extend(maximos)
+        intervalos = {m: (0.0, energia_maxima) for m, r in zip(masas, maximos) if r["exito"]}
+        exitos = {m: r for m, r in zip(masas, maximos) if r["exito"]}
+
+        while any(hi - lo > tolerancia for lo, hi in intervalos.values()):
+            pendientes = [m for m, (lo, hi) in intervalos.items() if hi - lo > tolerancia]
+            tareas, claves = [], []
+            for m in pendientes:
+                lo, hi = intervalos[m]
+                for e in np.linspace(lo, hi, puntos + 2)[1:-1].tolist():
+                    tareas.append(tarea(m, e))
+                    claves.append(m)
+            ronda = list(pool.map(evaluar, tareas))
+            evaluaciones.extend(ronda)
+            for m in pendientes:
+                lo, hi = intervalos[m]
+                for r in sorted((r for c, r in zip(claves, ronda) if c == m), key=lambda r: r["energia"]):
+                    if r["exito"]:
+                        hi = min(hi, r["energia"])
+                        exitos[m] = r
+                        break
+                    lo = max(lo, r["energia"])
+                intervalos[m] = (lo, hi)
+
+    tiempo_total = sum(r["tiempo_simulado"] for r in evaluaciones)
+    por_masa = [{"masa": m, **({"energia_minima": exitos[m]["energia"], "k": exitos[m]["k"], "x": exitos[m]["x"]}
+                               if m in exitos else {"energia_minima": None})}
+                for m in masas]
+    mejor = min(exitos.values(), key=lambda r: r["energia"]) if exitos else None
+    return {
+        "mejor": mejor,
+        "por_masa": por_masa,
+        "evaluaciones": len(evaluaciones),
+        # Tiempo simulado promedio por evaluación, frente a `duracion` sin parada temprana
+        "tiempo_simulado_medio": tiempo_total / len(evaluaciones) if evaluaciones else 0.0,
+        "duracion_maxima": duracion,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Busca la menor energía del resorte que derriba el último dominó, por masa.")
+    parser.add_argument("--masas", type=float, nargs="+", help="Masas a probar (por defecto, 5 valores del slider)")
+    parser.add_argument("--tolerancia", type=float, default=1.0, help="Ancho final del intervalo de energía")
+    parser.add_argument("--puntos", type=int, help="Energías evaluadas por masa en cada ronda")
+    comandos.agregar_escena(parser)
+    comandos.agregar_dominos(parser, motor.NUM_DOMINOS, motor.MAX_DOMINOS)
+    parser.add_argument("--duracion", type=float, default=15.0, help="Tiempo simulado máximo por corrida (s)")
+    parser.add_argument("--dt", type=float, default=motor.DT, help="Paso de integración (s)")
+    comandos.agregar_procesos(parser)
+    comandos.agregar_salida(parser)
+    args = parser.parse_args(argv)
+
+    masas = args.masas
+    if not masas:
+        rangos = escenas.cargar(args.escena).meta["sliders"] if args.escena else escenas.SLIDERS_POR_DEFECTO
+        masas = np.linspace(rangos["masa"]["min"], rangos["masa"]["max"], 5).tolist()
+
+    resultados = optimizar(masas, args.tolerancia, args.puntos, args.duracion, args.dt, args.dominos,
+                           args.escena, args.procesos)
+    comandos.escribir_json(resultados, args.salida)
+
+
+if __name__ == "__main__":
+    main()
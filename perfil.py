@@ -0,0 +1,146 @@
+import json
+import os
+import time
+
+import numpy as np
+
+# Perfilado por frame.
+# Las etapas del bucle principal se marcan con `with perfil.span("nombre")`.
+# Cada tramo se guarda en un buffer circular de NumPy (nombre, inicio,
+# duración, frame, profundidad); con el perfilador apagado `span` devuelve un
+# contexto vacío y el costo es una comparación. Los tramos se pueden resumir
+# por frame para el HUD o exportar como traza de Chrome (chrome://tracing).
+
+
+class _Nulo:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class _Span:
+    __slots__ = ("perfilador", "nombre", "inicio")
+
+    def __init__(self, perfilador, nombre):
+        self.perfilador = perfilador
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.perfilador._profundidad += 1
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        fin = time.perf_counter()
+        p = self.perfilador
+        p._profundidad -= 1
+        p.registrar(self.nombre, self.inicio, fin - self.inicio, p._profundidad)
+        return False
+
+
+class Perfilador:
+    """Tramos de tiempo en un buffer circular, agrupados por frame."""
+
+    def __init__(self, capacidad=16384, activo=False):
+        self.activo = activo
+        self._id = np.zeros(capacidad, dtype=np.int16)
+        self._inicio = np.zeros(capacidad)
+        self._duracion = np.zeros(capacidad)
+        self._frame = np.zeros(capacidad, dtype=np.int64)
+        self._nivel = np.zeros(capacidad, dtype=np.int8)
+        self._nombres = []
+        self._ids = {}
+        self._n = 0            # Tramos registrados desde el último limpiar (puede superar la capacidad)
+        self._profundidad = 0
+        self.frame = 0
+        self._origen = time.perf_counter()
+
+    def span(self, nombre):
+        """Contexto que mide el bloque; no hace nada con el perfilador apagado."""
+        if not self.activo:
+            return _NULO
+        return _Span(self, nombre)
+
+    def registrar(self, nombre, inicio, duracion, profundidad=0):
+        i = self._ids.get(nombre)
+        if i is None:
+            i = self._ids[nombre] = len(self._nombres)
+            self._nombres.append(nombre)
+        k = self._n % len(self._id)
+        self._id[k] = i
+        self._inicio[k] = inicio
+        self._duracion[k] = duracion
+        self._frame[k] = self.frame
+        self._nivel[k] = profundidad
+        self._n += 1
+
+    def marcar_frame(self):
+        self.frame += 1
+
+    def alternar(self):
+        self.activo = not self.activo
+        return self.activo
+
+    def limpiar(self):
+        self._n = 0
+        self.frame = 0
+        self._origen = time.perf_counter()
+
+    def _validos(self):
+        """Índices de los tramos guardados, del más viejo al más nuevo."""
+        capacidad = len(self._id)
+        if self._n <= capacidad:
+            return np.arange(self._n)
+        return (np.arange(capacidad) + self._n) % capacidad
+
+    def desglose(self, frames=60):
+        """Milisegundos promedio por frame de cada etapa en los últimos `frames` frames.
+
+        Devuelve una lista de (nombre, profundidad, ms) en el orden en que
+        aparecieron las etapas.
+        """
+        indices = self._validos()
+        recientes = indices[self._frame[indices] >= self.frame - frames]
+        recientes = recientes[self._frame[recientes] < self.frame]  # Solo frames terminados
+        if not len(recientes):
+            return []
+        cuantos = len(np.unique(self._frame[recientes]))
+        ids = self._id[recientes]
+        totales = np.bincount(ids, weights=self._duracion[recientes], minlength=len(self._nombres))
+        niveles = np.full(len(self._nombres), np.iinfo(np.int8).max)
+        np.minimum.at(niveles, ids, self._nivel[recientes])
+        presentes = np.unique(ids)
+        return [(self._nombres[i], int(niveles[i]), 1000 * totales[i] / cuantos) for i in presentes]
+
+    def traza_chrome(self):
+        """Eventos en el formato Trace Event de Chrome (fases "X", tiempos en µs)."""
+        pid = os.getpid()
+        eventos = []
+        for k in self._validos().tolist():
+            eventos.append({
+                "name": self._nombres[self._id[k]],
+                "ph": "X",
+                "ts": (self._inicio[k] - self._origen) * 1e6,
+                "dur": self._duracion[k] * 1e6,
+                "pid": pid,
+                "tid": 0,
+                "args": {"frame": int(self._frame[k])},
+            })
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def exportar_chrome(self, ruta):
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(self.traza_chrome(), archivo)
+        return ruta
+
+
+# Perfilador global que usan main.py y SimulacionGoldberg
+perfil = Perfilador()
@@ -0,0 +1,428 @@
+import argparse
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import comandos
+import escena as escenas
+import motor
+from optimizador import MARGEN_CAIDA, TIEMPO_DETENIDA, VELOCIDAD_REPOSO, criterio_parada
+
+# Predicción rápida de la trayectoria de la esfera.
+# Un modelo reducido de la esfera sobre los segmentos de la escena (plataformas
+# y arco), integrado con NumPy para miles de juegos de parámetros a la vez. La
+# esfera es un disco (I = m·r²/2, como moment_for_circle) en caída libre; en
+# contacto con el segmento en que más penetra recibe un impulso normal con
+# restitución y uno de fricción de Coulomb que la lleva a rodar sin deslizar.
+# Los materiales se combinan como en pymunk (producto de fricciones y de
+# elasticidades). El impulso inicial es el de calcular_fuerza(); como todo lo
+# demás va por unidad de masa, la masa solo entra en la velocidad inicial J/m.
+# Los dominós no se simulan: la corrida termina cuando la esfera toca el primero.
+#
+# Cota de error. El modelo ignora el solver iterativo de pymunk, los contactos
+# múltiples simultáneos y el deslizamiento de los dominós, así que cerca del
+# umbral puede equivocarse. validar() mide, para cada caso en que el modelo y
+# pymunk discrepan, el menor cambio relativo del impulso que hace coincidir al
+# modelo; el máximo es la cota. clasificar() da por seguro un caso solo si el
+# resultado del modelo no cambia con el impulso multiplicado por 1 ± margen, y
+# los dudosos se resuelven con pymunk (ver hibrido()). Llegar o no es monótono
+# en el impulso, así que basta con los dos extremos, y el inferior solo hace
+# falta donde el superior llega; el impulso nominal, solo para los dudosos.
+#
+# Una trayectoria termina en cuanto se sabe el resultado: al tocar un dominó, al
+# salir de la escena (por debajo, o por un costado alejándose) o cuando ya no le
+# queda energía para subir hasta el dominó más bajo.
+#
+# Medición (escena goldberg, pymunk 6.9.0, `--validar --muestras 300 --semilla 1`):
+# acuerdo 0.9967 (1 discrepancia en 300), cota_impulso 0.01; error en el
+# tiempo de llegada p95 0.037 s, máximo 2.14 s. El tiempo de llegada es
+# orientativo; la cota solo vale para la decisión de si la esfera llega. Hay que
+# volver a medir al cambiar la escena, el modelo o la versión de pymunk.
+#
+# Costo (1 CPU, `--muestras 2000 --semilla 2`): 6.0 s con el margen por
+# defecto y 3.5 s con `--margen 0`, frente a 29.8 s de simular_pymunk sobre las
+# mismas 2000 muestras.
+
+DT = 1 / 240              # s: a 2400 px/s la esfera avanza 10 px, menos que radio + grosor
+DURACION = 8.0            # s simulados como máximo
+BETA = 0.5                # I / (m·r²) de un disco
+PASO_VALIDACION = 0.01    # Resolución con que validar() busca la cota
+COTA_MEDIDA = 0.01        # cota_impulso de la medición de arriba
+# La cota medida más un paso de la malla, porque la verdadera puede estar hasta un paso más lejos
+MARGEN_IMPULSO = COTA_MEDIDA + PASO_VALIDACION
+
+# Motivo por el que terminó la trayectoria de cada caso
+EN_CURSO, ALCANZO, FUERA, DETENIDA, TIEMPO = range(5)
+MOTIVOS = ("en_curso", "alcanzo_dominos", "esfera_fuera", "esfera_detenida", "tiempo")
+
+
+## Geometría:
+
+class Geometria:
+    """Segmentos, arcos y dominós de una escena compilada, en arreglos listos para el modelo."""
+
+    def __init__(self, escena=None):
+        compilada = escenas.cargar(escena or "goldberg")
+        segmentos = compilada.arreglos["segmentos"]
+        material = compilada.meta["esfera"]["material"]
+        self.a = segmentos[:, 0:2]
+        self.ab = segmentos[:, 2:4] - self.a
+        self.largo2 = np.maximum((self.ab ** 2).sum(1), 1e-12)
+        # Por componentes: el modelo evita reducir sobre el eje (x, y) en cada paso
+        self.ax, self.ay = self.a[:, 0].copy(), self.a[:, 1].copy()
+        self.abx, self.aby = self.ab[:, 0].copy(), self.ab[:, 1].copy()
+        self.inverso_largo2 = 1 / self.largo2
+        self.grosor = segmentos[:, 4]
+        self.friccion = segmentos[:, 5] * material["friccion"]
+        self.elasticidad = segmentos[:, 6] * material["elasticidad"]
+        self.grupo = compilada.arreglos["segmentos_grupo"]
+        self.grupos = compilada.meta["grupos_segmentos"]
+        self.apoyo = np.array(compilada.apoyo_esfera, dtype=np.float64)
+        self.impulso_maximo = compilada.impulso_maximo
+        self.limite_y = (segmentos[:, [1, 3]].max() + self.grosor.max() + MARGEN_CAIDA) if len(segmentos) else 0.0
+        # Extremos horizontales de la escena: más allá no hay nada con qué chocar
+        xs = [segmentos[:, [0, 2]].min() - self.grosor.max(), segmentos[:, [0, 2]].max() + self.grosor.max()] \
+            if len(segmentos) else [np.inf, -np.inf]
+
+        # Índice de arco de cada grupo (-1 para las plataformas)
+        self.arcos = [g for g in self.grupos if g["tipo"] == "arco"]
+        self.arco_de_grupo = np.full(len(self.grupos), -1)
+        for i, g in enumerate(self.grupos):
+            if g["tipo"] == "arco":
+                self.arco_de_grupo[i] = self.arcos.index(g)
+
+        # Dominós como rectángulos rotados y su caja envolvente para descartar rápido
+        self.dominos = compilada.arreglos["dominos_posicion"]
+        angulos = compilada.arreglos["dominos_angulo"]
+        self.cos, self.sin = np.cos(angulos), np.sin(angulos)
+        tamanos = np.array([[g["ancho"], g["alto"]] for g in compilada.meta["grupos_dominos"]]).reshape(-1, 2)
+        self.medio = tamanos[compilada.arreglos["dominos_grupo"]] / 2
+        if len(self.dominos):
+            alcance = np.hypot(*self.medio.T).max()
+            self.caja = (self.dominos.min(0) - alcance, self.dominos.max(0) + alcance)
+            xs = [min(xs[0], self.caja[0][0]), max(xs[1], self.caja[1][0])]
+        self.limite_x = tuple(xs)
+        # Punto más bajo de los dominós (y crece hacia abajo); sin dominós, nada que alcanzar
+        self.fondo_dominos = self.caja[1][1] + self.grosor.max(initial=0.0) if len(self.dominos) else -np.inf
+
+
+def _avance_arco(arco, p):
+    """Fracción recorrida del arco (0 al inicio, 1 al final) por los puntos p."""
+    ai, af = arco["angulo_inicial"], arco["angulo_final"]
+    theta = np.arctan2(p[:, 1] - arco["centro"][1], p[:, 0] - arco["centro"][0])
+    tramo = abs(af - ai)
+    m = np.mod((ai - theta) if af < ai else (theta - ai), 2 * np.pi)
+    # Fuera del tramo: se asigna al extremo más cercano
+    return np.where(m <= tramo, m / tramo, np.where(m - tramo < 2 * np.pi - m, 1.0, 0.0))
+
+
+def _toca_dominos(geometria, p, r):
+    """True para las esferas que tocan algún dominó."""
+    toca = np.zeros(len(p), dtype=bool)
+    if not len(geometria.dominos):
+        return toca
+    lo, hi = geometria.caja
+    cerca = np.nonzero(((p + r[:, None] >= lo) & (p - r[:, None] <= hi)).all(1))[0]
+    if not len(cerca):
+        return toca
+    rel = p[cerca, None, :] - geometria.dominos
+    lx = rel[..., 0] * geometria.cos + rel[..., 1] * geometria.sin
+    ly = -rel[..., 0] * geometria.sin + rel[..., 1] * geometria.cos
+    dx = np.maximum(np.abs(lx) - geometria.medio[:, 0], 0)
+    dy = np.maximum(np.abs(ly) - geometria.medio[:, 1], 0)
+    toca[cerca] = (dx ** 2 + dy ** 2 <= r[cerca, None] ** 2).any(1)
+    return toca
+
+
+## Modelo:
+
+def predecir(k, x, masa, radio, gravedad, escena=None, factor_impulso=1.0, duracion=DURACION, dt=DT,
+             geometria=None):
+    """Integra la trayectoria de la esfera para todos los juegos de parámetros a la vez.
+
+    Los parámetros se combinan con las reglas de broadcasting de NumPy; cada
+    arreglo del resultado tiene la forma común. `factor_impulso` escala el
+    impulso de calcular_fuerza() (lo usa clasificar para medir la sensibilidad).
+    """
+    geometria = geometria or Geometria(escena)
+    arreglos = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64)
+                                     for v in (k, x, masa, radio, gravedad, factor_impulso)))
+    forma = arreglos[0].shape
+    k, x, masa, radio, gravedad, factor = (a.ravel() for a in arreglos)
+    n = k.size
+    impulso = motor.impulso_resorte(k, x, geometria.impulso_maximo) * factor
+
+    num_grupos, num_arcos = len(geometria.grupos), len(geometria.arcos)
+    motivo = np.full(n, TIEMPO, dtype=np.int8)
+    tiempo_final = np.full(n, duracion)
+    velocidad_llegada = np.full(n, np.nan)
+    posicion_final = np.empty((n, 2))
+    toco = np.zeros((n, num_grupos), dtype=bool)
+    avance = np.zeros((n, num_arcos))
+
+    # Estado de los casos que siguen en curso; se compacta cuando alguno termina
+    indice = np.arange(n)
+    r, g = radio.copy(), gravedad.copy()
+    p = np.column_stack((np.full(n, geometria.apoyo[0]), geometria.apoyo[1] - r))
+    v = np.column_stack((impulso / masa, np.zeros(n)))
+    w = np.zeros(n)
+    quieta = np.zeros(n)
+    umbral_rebote = 2 * g * dt  # Por debajo, contacto en reposo: sin rebote
+
+    pasos = int(round(duracion / dt))
+    for paso in range(1, pasos + 1):
+        if not len(indice):
+            break
+        v[:, 1] += g * dt
+        p += v * dt
+
+        # Segmento con más penetración para cada esfera
+        rx = p[:, 0:1] - geometria.ax
+        ry = p[:, 1:2] - geometria.ay
+        t = np.clip((rx * geometria.abx + ry * geometria.aby) * geometria.inverso_largo2, 0, 1)
+        dx = rx - t * geometria.abx
+        dy = ry - t * geometria.aby
+        dist = np.sqrt(dx * dx + dy * dy)
+        penetracion = (r[:, None] + geometria.grosor) - dist
+        j = penetracion.argmax(1)
+        filas = np.arange(len(indice))
+        pen = penetracion[filas, j]
+        c = np.nonzero(pen > 0)[0]
+        if len(c):
+            jc = j[c]
+            normal = np.column_stack((dx[c, jc], dy[c, jc])) / np.maximum(dist[c, jc], 1e-9)[:, None]
+            p[c] += normal * pen[c, None]
+
+            vn = (v[c] * normal).sum(1)
+            e = np.where(-vn > umbral_rebote[c], geometria.elasticidad[jc], 0.0)
+            jn = np.where(vn < 0, -(1 + e) * vn, 0.0)
+            v[c] += jn[:, None] * normal
+
+            # Fricción: lleva el deslizamiento del punto de contacto a cero, con tope μ·jn
+            tangente = np.column_stack((-normal[:, 1], normal[:, 0]))
+            deslizamiento = (v[c] * tangente).sum(1) - w[c] * r[c]
+            tope = geometria.friccion[jc] * jn
+            jt = np.clip(deslizamiento * BETA / (1 + BETA), -tope, tope)
+            v[c] -= jt[:, None] * tangente
+            w[c] += jt / (BETA * r[c])
+
+            grupo = geometria.grupo[jc]
+            toco[indice[c], grupo] = True
+            arco = geometria.arco_de_grupo[grupo]
+            for a in np.unique(arco[arco >= 0]).tolist():
+                en_arco = arco == a
+                filas_arco = indice[c[en_arco]]
+                avance[filas_arco, a] = np.maximum(avance[filas_arco, a],
+                                                   _avance_arco(geometria.arcos[a], p[c[en_arco]]))
+
+        rapidez = np.hypot(v[:, 0], v[:, 1])
+        quieta = np.where(rapidez < VELOCIDAD_REPOSO, quieta + dt, 0.0)
+        # Energía por unidad de masa; el modelo no la gana, así que la altura
+        # máxima que puede alcanzar el centro es -energia / g
+        energia = 0.5 * (rapidez ** 2 + BETA * (r * w) ** 2) - g * p[:, 1]
+        sin_energia = (g > 0) & (energia < -g * (geometria.fondo_dominos + r))
+        x_min, x_max = geometria.limite_x
+        afuera = ((p[:, 0] + r < x_min) & (v[:, 0] <= 0)) | ((p[:, 0] - r > x_max) & (v[:, 0] >= 0))
+        estado = np.full(len(indice), EN_CURSO, dtype=np.int8)
+        estado[(quieta >= TIEMPO_DETENIDA) | sin_energia] = DETENIDA
+        estado[(p[:, 1] > geometria.limite_y) | afuera] = FUERA
+        alcanzo = _toca_dominos(geometria, p, r)
+        estado[alcanzo] = ALCANZO
+
+        terminados = np.nonzero(estado != EN_CURSO)[0]
+        if len(terminados):
+            i = indice[terminados]
+            motivo[i] = estado[terminados]
+            tiempo_final[i] = paso * dt
+            posicion_final[i] = p[terminados]
+            velocidad_llegada[i] = np.where(alcanzo[terminados], rapidez[terminados], np.nan)
+            sigue = estado == EN_CURSO
+            indice, r, g, p, v, w, quieta, umbral_rebote = (
+                indice[sigue], r[sigue], g[sigue], p[sigue], v[sigue], w[sigue], quieta[sigue], umbral_rebote[sigue])
+    posicion_final[indice] = p
+
+    alcanza = motivo == ALCANZO
+    return {
+        "impulso": impulso.reshape(forma),
+        "alcanza_dominos": alcanza.reshape(forma),
+        "motivo": motivo.reshape(forma),
+        "tiempo_llegada": np.where(alcanza, tiempo_final, np.nan).reshape(forma),
+        "velocidad_llegada": velocidad_llegada.reshape(forma),
+        "posicion_final": posicion_final.reshape(forma + (2,)),
+        "toco_grupo": toco.reshape(forma + (num_grupos,)),
+        "avance_arcos": avance.reshape(forma + (num_arcos,)),
+    }
+
+
+def clasificar(k, x, masa, radio, gravedad, escena=None, margen=MARGEN_IMPULSO, geometria=None, **opciones):
+    """Si la esfera llega a los dominós y si es seguro: no cambia con el impulso en 1 ± margen.
+
+    Como el resultado es monótono en el impulso, primero se integra el extremo
+    superior: los casos que no llegan ni así son seguros. Solo los que llegan
+    se integran con el extremo inferior, y solo los dudosos con el nominal.
+    """
+    geometria = geometria or Geometria(escena)
+    parametros = [a.ravel() for a in np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (k, x, masa, radio, gravedad)))]
+    forma = np.broadcast_shapes(*(np.shape(v) for v in (k, x, masa, radio, gravedad)))
+    if not margen:
+        alcanza = predecir(*parametros, geometria=geometria, **opciones)["alcanza_dominos"]
+        return {"alcanza_dominos": alcanza.reshape(forma), "seguro": np.ones(forma, dtype=bool)}
+
+    alcanza = predecir(*parametros, factor_impulso=1 + margen, geometria=geometria, **opciones)["alcanza_dominos"]
+    seguro = ~alcanza
+    llegan = np.nonzero(alcanza)[0]
+    if len(llegan):
+        seguro[llegan] = predecir(*(v[llegan] for v in parametros), factor_impulso=1 - margen,
+                                  geometria=geometria, **opciones)["alcanza_dominos"]
+    dudosos = np.nonzero(~seguro)[0]
+    if len(dudosos):
+        alcanza[dudosos] = predecir(*(v[dudosos] for v in parametros), geometria=geometria,
+                                    **opciones)["alcanza_dominos"]
+    return {"alcanza_dominos": alcanza.reshape(forma), "seguro": seguro.reshape(forma)}
+
+
+## Comparación con pymunk:
+
+def simular_pymunk(argumentos):
+    """Corrida completa con pymunk, cortada en cuanto se sabe si la esfera llega a los dominós."""
+    parametros, duracion, dt, escena = argumentos
+    sim = motor.MotorGoldberg(**parametros, plantilla=motor.plantilla_para(escena), series=False)
+    decidido = criterio_parada(sim)
+
+    def detener(sim):
+        return "alcanzo_dominos" if sim.alcanzo_dominos else decidido(sim)
+
+    resultados = sim.ejecutar(duracion, dt, detener=detener)
+    tiempos = sim.impactos.tiempo
+    return {
+        "alcanza_dominos": bool(sim.alcanzo_dominos),
+        "tiempo_llegada": float(np.nanmin(tiempos)) if sim.alcanzo_dominos and not np.isnan(tiempos).all() else None,
+        "motivo_parada": resultados["motivo_parada"],
+    }
+
+
+def _muestrear(muestras, escena, rng):
+    rangos = escenas.cargar(escena or "goldberg").meta["sliders"]
+    return {nombre: rng.uniform(rangos[nombre]["min"], rangos[nombre]["max"], muestras)
+            for nombre in ("k", "x", "masa", "radio", "gravedad")}
+
+
+def _parametros(muestra, i):
+    return {nombre: float(valores[i]) for nombre, valores in muestra.items()}
+
+
+def hibrido(k, x, masa, radio, gravedad, escena=None, margen=MARGEN_IMPULSO, duracion=DURACION, procesos=None,
+            **opciones):
+    """Resultado para cada juego de parámetros: el modelo donde es seguro, pymunk donde no."""
+    muestra = dict(zip(("k", "x", "masa", "radio", "gravedad"),
+                       (a.ravel() for a in np.broadcast_arrays(k, x, masa, radio, gravedad))))
+    clasificacion = clasificar(**muestra, escena=escena, margen=margen, duracion=duracion, **opciones)
+    alcanza = clasificacion["alcanza_dominos"].copy()
+    dudosos = np.nonzero(~clasificacion["seguro"])[0]
+    if len(dudosos):
+        tareas = [(_parametros(muestra, i), duracion, motor.DT, escena) for i in dudosos.tolist()]
+        with ProcessPoolExecutor(max_workers=comandos.num_procesos(procesos)) as pool:
+            alcanza[dudosos] = [r["alcanza_dominos"] for r in pool.map(simular_pymunk, tareas, chunksize=8)]
+    return {"alcanza_dominos": alcanza, "simulados_con_pymunk": dudosos, "seguro": clasificacion["seguro"]}
+
+
+def validar(muestras=200, semilla=None, escena=None, duracion=DURACION, procesos=None, dt=DT):
+    """Compara el modelo con pymunk en parámetros al azar y mide la cota de error.
+
+    Para cada caso en que discrepan se busca el menor |f - 1| con el que el
+    modelo, con el impulso multiplicado por f, coincide con pymunk; la cota es
+    el mayor de esos valores. También se informa el error en el tiempo de llegada.
+    """
+    rng = np.random.default_rng(semilla)
+    muestra = _muestrear(muestras, escena, rng)
+    geometria = Geometria(escena)
+
+    inicio = time.perf_counter()
+    prediccion = predecir(**muestra, geometria=geometria, duracion=duracion, dt=dt)
+    tiempo_modelo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    tareas = [(_parametros(muestra, i), duracion, motor.DT, escena) for i in range(muestras)]
+    with ProcessPoolExecutor(max_workers=comandos.num_procesos(procesos)) as pool:
+        referencia = list(pool.map(simular_pymunk, tareas, chunksize=8))
+    tiempo_pymunk = time.perf_counter() - inicio
+
+    esperado = np.array([r["alcanza_dominos"] for r in referencia])
+    discrepan = np.nonzero(prediccion["alcanza_dominos"] != esperado)[0]
+
+    # Para cada discrepancia, el menor cambio de impulso que hace coincidir al modelo
+    desvios = np.arange(-0.5, 0.5 + PASO_VALIDACION / 2, PASO_VALIDACION)
+    cotas = []
+    if len(discrepan):
+        sub = {nombre: valores[discrepan, None] for nombre, valores in muestra.items()}
+        barrido = predecir(**sub, factor_impulso=1 + desvios, geometria=geometria, duracion=duracion, dt=dt)
+        coincide = barrido["alcanza_dominos"] == esperado[discrepan, None]
+        distancia = np.where(coincide, np.abs(desvios), np.inf).min(1)
+        cotas = distancia.tolist()
+    cota = max(cotas) if cotas else 0.0
+
+    ambos = [i for i, r in enumerate(referencia)
+             if r["tiempo_llegada"] is not None and prediccion["alcanza_dominos"][i]]
+    error_tiempo = np.array([abs(prediccion["tiempo_llegada"][i] - referencia[i]["tiempo_llegada"]) for i in ambos])
+    return {
+        "muestras": muestras,
+        "acuerdo": float(1 - len(discrepan) / muestras),
+        "discrepancias": len(discrepan),
+        # inf: alguna discrepancia no se corrige ni con ±50 % del impulso
+        "cota_impulso": cota if math.isfinite(cota) else None,
+        "cotas_por_discrepancia": [c if math.isfinite(c) else None for c in cotas],
+        "error_tiempo_llegada_s": {
+            "n": len(error_tiempo),
+            "mediana": float(np.median(error_tiempo)) if len(error_tiempo) else None,
+            "p95": float(np.percentile(error_tiempo, 95)) if len(error_tiempo) else None,
+            "maximo": float(error_tiempo.max()) if len(error_tiempo) else None,
+        },
+        "tiempo_modelo_s": tiempo_modelo,
+        "tiempo_pymunk_s": tiempo_pymunk,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Predice con un modelo reducido si la esfera llega a los dominós, para muchos parámetros.")
+    parser.add_argument("--muestras", type=int, default=10000, help="Juegos de parámetros al azar (sliders)")
+    parser.add_argument("--validar", action="store_true", help="Comparar con pymunk y medir la cota de error")
+    parser.add_argument("--hibrido", action="store_true", help="Resolver con pymunk los casos dudosos")
+    parser.add_argument("--margen", type=float, default=MARGEN_IMPULSO, help="Cota relativa del error en el impulso")
+    comandos.agregar_escena(parser)
+    parser.add_argument("--duracion", type=float, default=DURACION, help="Tiempo simulado máximo (s)")
+    parser.add_argument("--dt", type=float, default=DT, help="Paso de integración del modelo (s)")
+    parser.add_argument("--semilla", type=int, help="Semilla de los parámetros al azar")
+    comandos.agregar_procesos(parser, "para pymunk")
+    comandos.agregar_salida(parser)
+    args = parser.parse_args(argv)
+
+    if args.validar:
+        resultados = validar(args.muestras, args.semilla, args.escena, args.duracion, args.procesos, args.dt)
+    else:
+        muestra = _muestrear(args.muestras, args.escena, np.random.default_rng(args.semilla))
+        inicio = time.perf_counter()
+        if args.hibrido:
+            salida = hibrido(**muestra, escena=args.escena, margen=args.margen, duracion=args.duracion,
+                             procesos=args.procesos, dt=args.dt)
+            simulados = len(salida["simulados_con_pymunk"])
+        else:
+            salida = clasificar(**muestra, escena=args.escena, margen=args.margen, duracion=args.duracion, dt=args.dt)
+            simulados = 0
+        resultados = {
+            "muestras": args.muestras,
+            "margen": args.margen,
+            "probabilidad_alcanza": float(salida["alcanza_dominos"].mean()),
+            "fraccion_dudosos": float(1 - salida["seguro"].mean()),
+            "simulados_con_pymunk": simulados,
+            "tiempo_s": time.perf_counter() - inicio,
+        }
+
+    comandos.escribir_json(resultados, args.salida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import numpy as np
+
+# Registro de series de energía respaldado por un arreglo estructurado de NumPy.
+# Una fila por paso y una columna por magnitud. Crece duplicando su capacidad,
+# o bien funciona como buffer circular si se fija `capacidad_maxima`.
+
+COLUMNAS_ENERGIA = (
+    "tiempo",
+    "energia_cinetica",
+    "energia_potencial_elastica",
+    "energia_potencial_gravitacional",
+    "energia_mecanica",
+)
+
+DTYPE_ENERGIAS = np.dtype([(nombre, np.float64) for nombre in COLUMNAS_ENERGIA])
+
+
+class RegistroEnergias:
+    """Series de energía en un arreglo estructurado preasignado."""
+
+    def __init__(self, capacidad=1024, capacidad_maxima=None, dtype=DTYPE_ENERGIAS):
+        if capacidad_maxima is not None:
+            capacidad = capacidad_maxima
+        self.capacidad_maxima = capacidad_maxima
+        self._datos = np.zeros(capacidad, dtype=dtype)
+        self._inicio = 0  # Fila más antigua (solo cambia en modo circular)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def circular(self):
+        return self.capacidad_maxima is not None
+
+    @property
+    def capacidad(self):
+        return len(self._datos)
+
+    def agregar(self, *valores):
+        """Agrega una fila con los valores en el orden de las columnas."""
+        capacidad = len(self._datos)
+        if self._n < capacidad:
+            indice = (self._inicio + self._n) % capacidad
+            self._n += 1
+        elif self.circular:
+            # Lleno: se sobrescribe la fila más antigua
+            indice = self._inicio
+            self._inicio = (self._inicio + 1) % capacidad
+        else:
+            self._crecer()
+            indice = self._n
+            self._n += 1
+        self._datos[indice] = valores
+
+    def _crecer(self, capacidad=None):
+        nuevos = np.zeros(capacidad or 2 * len(self._datos), dtype=self._datos.dtype)
+        nuevos[:self._n] = self._datos[:self._n]
+        self._datos = nuevos
+
+    def reservar(self, capacidad):
+        """Asegura espacio para `capacidad` filas sin volver a crecer (no aplica al modo circular)."""
+        if not self.circular and capacidad > len(self._datos):
+            self._crecer(capacidad)
+
+    def extender(self, filas):
+        """Agrega varias filas de golpe desde un arreglo estructurado compatible."""
+        filas = np.asarray(filas, dtype=self._datos.dtype)
+        if self.circular:
+            capacidad = len(self._datos)
+            filas = filas[-capacidad:]
+            indices = (self._inicio + self._n + np.arange(len(filas))) % capacidad
+            self._datos[indices] = filas
+            desborde = max(0, self._n + len(filas) - capacidad)
+            self._inicio = (self._inicio + desborde) % capacidad
+            self._n = min(capacidad, self._n + len(filas))
+        else:
+            self.reservar(self._n + len(filas))
+            self._datos[self._n:self._n + len(filas)] = filas
+            self._n += len(filas)
+
+    def ultimo(self):
+        """Última fila registrada (o None si está vacío)."""
+        if not self._n:
+            return None
+        return self._datos[(self._inicio + self._n - 1) % len(self._datos)]
+
+    def segmentos(self):
+        """Vistas (sin copia) de los datos en orden cronológico: uno o dos tramos."""
+        fin = self._inicio + self._n
+        if fin <= len(self._datos):
+            return (self._datos[self._inicio:fin],)
+        return (self._datos[self._inicio:], self._datos[:fin - len(self._datos)])
+
+    def datos(self):
+        """Arreglo estructurado con todas las filas en orden.
+
+        Es una vista sin copia salvo cuando el buffer circular ya dio la vuelta.
+        """
+        tramos = self.segmentos()
+        if len(tramos) == 1:
+            return tramos[0]
+        return np.concatenate(tramos)
+
+    def columna(self, nombre):
+        """Una columna como arreglo de NumPy (vista si es posible)."""
+        return self.datos()[nombre]
+
+    def limpiar(self):
+        self._inicio = 0
+        self._n = 0
+
+    def como_dict(self):
+        datos = self.datos()
+        return {nombre: datos[nombre] for nombre in datos.dtype.names}
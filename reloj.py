@@ -0,0 +1,46 @@
+# Reloj de física con paso fijo, desacoplado del reloj de dibujo.
+# Cada frame se acumula el tiempo real transcurrido (multiplicado por la
+# escala de tiempo) y se consume en pasos de `dt` fijo. Lo que sobra queda en
+# el acumulador y se usa como factor de interpolación al dibujar.
+
+ESCALAS_TIEMPO = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0)
+
+
+class RelojFisico:
+    """Acumulador de paso fijo con escala de tiempo (cámara lenta / avance rápido)."""
+
+    def __init__(self, dt=1 / 60.0, escala=1.0, max_pasos=120):
+        self.dt = dt
+        self.escala = escala
+        self.max_pasos = max_pasos  # Tope por frame para no entrar en espiral si la física no alcanza
+        self.acumulador = 0.0
+
+    def avanzar(self, tiempo_real):
+        """Acumula `tiempo_real` segundos y devuelve cuántos pasos de física tocan."""
+        self.acumulador += tiempo_real * self.escala
+        pasos = int(self.acumulador / self.dt)
+        if pasos > self.max_pasos:
+            # Se descarta el tiempo que no se alcanza a simular
+            pasos = self.max_pasos
+            self.acumulador = 0.0
+        else:
+            self.acumulador -= pasos * self.dt
+        return pasos
+
+    @property
+    def alpha(self):
+        """Fracción del paso siguiente ya transcurrida, para interpolar el dibujo."""
+        return min(1.0, self.acumulador / self.dt)
+
+    def reiniciar(self):
+        self.acumulador = 0.0
+
+    def acelerar(self):
+        mayores = [e for e in ESCALAS_TIEMPO if e > self.escala]
+        if mayores:
+            self.escala = mayores[0]
+
+    def desacelerar(self):
+        menores = [e for e in ESCALAS_TIEMPO if e < self.escala]
+        if menores:
+            self.escala = menores[-1]
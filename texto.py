@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+import pygame
+
+# Caché de texto renderizado para el HUD.
+# Rasterizar texto con font.render es caro; los textos que no cambian entre
+# frames (etiquetas, estado, botones) se reutilizan desde aquí.
+
+
+@lru_cache(maxsize=None)
+def fuente(tamano, nombre=None):
+    """Devuelve la fuente pedida, creándola solo la primera vez."""
+    if not pygame.font.get_init():
+        pygame.font.init()  # Basta con el módulo de fuentes; no hace falta abrir la ventana
+    return pygame.font.Font(nombre, tamano)
+
+
+class CacheTexto:
+    """Superficies de texto con desalojo LRU, indexadas por (fuente, texto, color)."""
+
+    def __init__(self, capacidad=256):
+        self.capacidad = capacidad
+        self._superficies = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def render(self, font, texto, color, antialias=True):
+        clave = (font, texto, color, antialias)
+        superficie = self._superficies.get(clave)
+        if superficie is not None:
+            self._superficies.move_to_end(clave)
+            self.aciertos += 1
+            return superficie
+
+        self.fallos += 1
+        superficie = font.render(texto, antialias, color)
+        self._superficies[clave] = superficie
+        if len(self._superficies) > self.capacidad:
+            self._superficies.popitem(last=False)
+        return superficie
+
+    def limpiar(self):
+        self._superficies.clear()
+
+
+cache_texto = CacheTexto()
+
+
+def render_texto(font, texto, color, antialias=True):
+    """Igual que font.render, pero pasando por la caché global."""
+    return cache_texto.render(font, texto, color, antialias)
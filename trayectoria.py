@@ -0,0 +1,186 @@
+import numpy as np
+import pymunk.batch
+
+# Registro del estado crudo de los cuerpos y cálculo vectorizado de energías.
+# Durante la simulación solo se copian posición, velocidad, ángulo y velocidad
+# angular de cada cuerpo; las series de energía se calculan al final, en una
+# sola pasada de NumPy sobre toda la trayectoria. Paso a paso, EstadoCuerpos hace
+# una sola lectura de los cuerpos con pymunk.batch que comparten las energías,
+# el análisis de la cascada y los registros de trayectoria.
+
+# Columnas del estado de cada cuerpo
+X, Y, VX, VY, ANGULO, OMEGA = range(6)
+NUM_COLUMNAS = 6
+
+# pymunk.batch entrega (x, y, ángulo, vx, vy, ω); COLUMNAS_BATCH lo reordena
+CAMPOS_BATCH = (pymunk.batch.BodyFields.BODY_ID | pymunk.batch.BodyFields.POSITION | pymunk.batch.BodyFields.ANGLE
+                | pymunk.batch.BodyFields.VELOCITY | pymunk.batch.BodyFields.ANGULAR_VELOCITY)
+COLUMNAS_BATCH = np.array([0, 1, 3, 4, 2, 5])
+
+
+def capturar_estado(cuerpos, destino):
+    """Copia (x, y, vx, vy, ángulo, ω) de cada cuerpo en las filas de `destino`."""
+    destino[:] = [(*b.position, *b.velocity, b.angle, b.angular_velocity) for b in cuerpos]
+
+
+class EstadoCuerpos:
+    """Estado (cuerpos, columnas) de varios cuerpos, leído una sola vez por paso.
+
+    capturar() lee todos los cuerpos del espacio con una sola llamada de
+    pymunk.batch, sin pasar por Python cuerpo por cuerpo, y reparte las filas
+    según el id de cada cuerpo: el orden en que pymunk los devuelve cambia
+    cuando se duermen o despiertan, y también vienen los cuerpos estáticos.
+    """
+
+    def __init__(self, space, cuerpos):
+        self.space = space
+        self.cuerpos = list(cuerpos)
+        self.estado = np.zeros((len(self.cuerpos), NUM_COLUMNAS), dtype=np.float64)
+        ids = np.array([b.id for b in self.cuerpos], dtype=np.uintp)
+        self._orden = np.argsort(ids)
+        self._ids = ids[self._orden]
+        self._buffer = pymunk.batch.Buffer()
+        # Para cada celda del estado, su posición en los datos planos del batch;
+        # se recalcula solo cuando cambia el orden de los ids
+        self._ids_batch = None
+        self._indice = None
+        capturar_estado(self.cuerpos, self.estado)
+
+    def _repartir(self, crudos):
+        ids = np.frombuffer(crudos, dtype=np.uintp)
+        orden = np.argsort(ids)
+        fila = orden[np.minimum(np.searchsorted(ids[orden], self._ids), len(ids) - 1)] if len(ids) else None
+        if fila is None or (ids[fila] != self._ids).any():
+            raise ValueError("EstadoCuerpos: hay cuerpos que ya no están en el espacio")
+        fila_batch = np.empty(len(self.cuerpos), dtype=np.intp)
+        fila_batch[self._orden] = fila
+        self._indice = fila_batch[:, None] * NUM_COLUMNAS + COLUMNAS_BATCH
+        self._ids_batch = crudos
+
+    def capturar(self):
+        """Actualiza el estado de todos los cuerpos y lo devuelve."""
+        self._buffer.clear()
+        pymunk.batch.get_space_bodies(self.space, CAMPOS_BATCH, self._buffer)
+        ids = self._buffer.int_buf()[:]
+        if ids != self._ids_batch:
+            self._repartir(ids)
+        datos = np.frombuffer(self._buffer.float_buf(), dtype=np.float64)
+        np.take(datos, self._indice, out=self.estado)
+        return self.estado
+
+
+class RegistroEstados:
+    """Trayectoria de varios cuerpos: arreglo (pasos, cuerpos, columnas) preasignado."""
+
+    def __init__(self, cuerpos, capacidad=1024):
+        self.cuerpos = list(cuerpos)
+        self.masas = np.array([b.mass for b in self.cuerpos], dtype=np.float64)
+        self.momentos = np.array([b.moment for b in self.cuerpos], dtype=np.float64)
+        self._tiempos = np.zeros(capacidad, dtype=np.float64)
+        self._estados = np.zeros((capacidad, len(self.cuerpos), NUM_COLUMNAS), dtype=np.float64)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def reservar(self, capacidad):
+        if capacidad > len(self._tiempos):
+            self._crecer(capacidad)
+
+    def _crecer(self, capacidad=None):
+        capacidad = capacidad or 2 * len(self._tiempos)
+        tiempos = np.zeros(capacidad, dtype=np.float64)
+        estados = np.zeros((capacidad,) + self._estados.shape[1:], dtype=np.float64)
+        tiempos[:self._n] = self._tiempos[:self._n]
+        estados[:self._n] = self._estados[:self._n]
+        self._tiempos, self._estados = tiempos, estados
+
+    def registrar(self, tiempo, estado=None):
+        """Copia el estado actual de todos los cuerpos en una fila nueva.
+
+        Si se da `estado` (ya leído en este paso, ver EstadoCuerpos) se copia
+        ese en lugar de volver a leer los cuerpos.
+        """
+        if self._n == len(self._tiempos):
+            self._crecer()
+        if estado is not None:
+            self._estados[self._n] = estado
+        else:
+            capturar_estado(self.cuerpos, self._estados[self._n])
+        self._tiempos[self._n] = tiempo
+        self._n += 1
+
+    @property
+    def tiempos(self):
+        return self._tiempos[:self._n]
+
+    @property
+    def estados(self):
+        """Vista (pasos, cuerpos, columnas) de lo registrado."""
+        return self._estados[:self._n]
+
+    def limpiar(self):
+        self._n = 0
+
+
+def energias_por_cuerpo(estados, masas, momentos, gravedad, origen_y, alturas_referencia=0.0):
+    """Energías de cada cuerpo en cada paso, con las escalas de SimulacionGoldberg.
+
+    Devuelve un dict de arreglos (pasos, cuerpos): cinética de traslación,
+    cinética de rotación y potencial gravitacional. La velocidad se divide
+    entre 10 y la gravedad entre 100, igual que en la interfaz.
+    """
+    vx = estados[..., VX] / 10
+    vy = estados[..., VY] / 10
+    omega = estados[..., OMEGA]
+    h = (origen_y - estados[..., Y]) - alturas_referencia
+    return {
+        "energia_cinetica": 0.5 * masas * (vx * vx + vy * vy),
+        "energia_cinetica_rotacional": 0.5 * (momentos / 100) * omega * omega,
+        "energia_potencial_gravitacional": masas * (gravedad / 100) * h,
+    }
+
+
+class EnergiasSistema:
+    """Energías de todos los cuerpos dinámicos en cada paso, sin recorrerlos en Python.
+
+    Usa el estado que ya leyó `estado` (un EstadoCuerpos) en este paso: quien
+    llama captura primero y calcular() solo hace tres productos punto. El
+    desglose por cuerpo se arma solo cuando se pide (`por_cuerpo`). El cero de
+    la energía potencial de cada cuerpo está en `y_referencia` (coordenada de
+    pymunk); por defecto es su posición inicial, así que los dominós solo
+    cuentan la energía que ganan o pierden durante la cascada.
+    """
+
+    def __init__(self, estado):
+        self.estado = estado
+        self.y_referencia = estado.estado[:, Y].copy()
+        self._gravedad = None
+        self.refrescar()
+
+    def refrescar(self):
+        """Vuelve a leer masas y momentos (por ejemplo, después de ajustar la esfera)."""
+        cuerpos = self.estado.cuerpos
+        self.masas = np.array([b.mass for b in cuerpos], dtype=np.float64)
+        self.momentos = np.array([b.moment for b in cuerpos], dtype=np.float64)
+        # Mismas escalas que energias_por_cuerpo, ya multiplicadas
+        self._factor_traslacion = 0.5 * self.masas / 100
+        self._factor_rotacion = 0.5 * self.momentos / 100
+
+    def calcular(self, gravedad):
+        """Totales (traslación, rotación, gravitacional) con el último estado capturado."""
+        self._gravedad = gravedad
+        e = self.estado.estado
+        vx, vy, omega = e[:, VX], e[:, VY], e[:, OMEGA]
+        return (float(self._factor_traslacion.dot(vx * vx + vy * vy)),
+                float(self._factor_rotacion.dot(omega * omega)),
+                float((gravedad / 100) * self.masas.dot(self.y_referencia - e[:, Y])))
+
+    @property
+    def por_cuerpo(self):
+        """Desglose del último calcular(): dict de arreglos (cuerpos,), o None."""
+        if self._gravedad is None:
+            return None
+        # Con origen 0 y alturas -y_referencia, la altura queda y_referencia - y
+        return energias_por_cuerpo(self.estado.estado, self.masas, self.momentos, self._gravedad, 0.0,
+                                   -self.y_referencia)